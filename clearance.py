@@ -0,0 +1,79 @@
+# clearance.py
+# Champ de distance signee 2D aux obstacles (plan x, z) : distance au bord du rocher le plus
+# proche, negative a l'interieur. Precalcule sur une grille couvrant le terrain, mis a jour
+# localement quand des rochers sont ajoutes ou retires, interroge par lots en bilineaire.
+import math
+import numpy as np
+from hazards import window_pairs
+from terrain_noise import grid_axis
+
+
+class ClearanceField:
+    """Distance signee aux rochers d'un obstacles.ObstacleField, bornee a `max_distance`.
+
+    Chaque rocher n'influence que les cellules a moins de rayon + max_distance de son centre :
+    la construction et les mises a jour ne touchent que ces fenetres.
+    """
+
+    def __init__(self, obstacles, size, cell_size, max_distance):
+        self.obstacles = obstacles
+        self.size = size
+        self.max_distance = max_distance
+        segments = max(1, math.ceil(size / cell_size))
+        self.spacing = size / segments
+        self.origin = -size / 2
+        self.xs = self.zs = grid_axis(segments, size)
+        self.distances = np.full((segments + 1, segments + 1), max_distance, dtype=np.float32)
+        self._stamp(np.flatnonzero(obstacles.alive))
+        obstacles.listeners.append(self.on_obstacles_changed)
+
+    def _stamp(self, indices, window=None):
+        # Minimum avec la distance signee de chaque rocher, sur sa fenetre d'influence
+        # (limitee a la fenetre de cellules (j0, j1, i0, i1) si elle est donnee)
+        if not len(indices): return
+        j0, j1, i0, i1 = window or (0, len(self.zs), 0, len(self.xs))
+        xs, zs = self.xs[i0:i1], self.zs[j0:j1]
+        block = self.distances[j0:j1, i0:i1].copy()
+        centers = self.obstacles.centers[indices][:, [0, 2]].astype(np.float64)
+        radii = self.obstacles.radii[indices].astype(np.float64)
+        flat = block.reshape(-1)
+        for owner, ii, jj in window_pairs(xs, zs, centers, radii + self.max_distance):
+            d = np.hypot(xs[ii] - centers[owner, 0], zs[jj] - centers[owner, 1]) - radii[owner]
+            np.minimum.at(flat, jj * len(xs) + ii, d.astype(np.float32))
+        self.distances[j0:j1, i0:i1] = block
+
+    def on_obstacles_changed(self, added, removed):
+        for i in np.asarray(removed).tolist():
+            # Fenetre du rocher retire remise a max_distance, puis reimpression, dans cette fenetre
+            # seulement, des rochers restants qui l'influencent (trouves par l'index spatial)
+            center = self.obstacles.centers[i].astype(np.float64)
+            reach = self.obstacles.radii[i] + self.max_distance
+            i0, i1 = np.clip(np.searchsorted(self.xs, (center[0] - reach, center[0] + reach)) + (0, 1), 0, len(self.xs))
+            j0, j1 = np.clip(np.searchsorted(self.zs, (center[2] - reach, center[2] + reach)) + (0, 1), 0, len(self.zs))
+            self.distances[j0:j1, i0:i1] = self.max_distance
+            margin = reach + self.max_distance + self.spacing
+            neighbours = self.obstacles.nearby((center[0] - margin, -np.inf, center[2] - margin),
+                                               (center[0] + margin, np.inf, center[2] + margin))
+            self._stamp(neighbours, (int(j0), int(j1), int(i0), int(i1)))
+        if len(added):
+            self._stamp(added)
+
+    def sample(self, points):
+        """Distances (N,) en (x, z), interpolees en bilineaire ; NaN hors de la grille."""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        u = (points[:, 0] - self.origin) / self.spacing
+        v = (points[:, 1] - self.origin) / self.spacing
+        last = len(self.xs) - 1
+        inside = (u >= 0) & (u <= last) & (v >= 0) & (v <= last)
+        i0 = np.clip(np.floor(u), 0, last - 1).astype(np.int64)
+        j0 = np.clip(np.floor(v), 0, last - 1).astype(np.int64)
+        fu, fv = u - i0, v - j0
+        d = self.distances
+        result = ((d[j0, i0] * (1 - fu) + d[j0, i0 + 1] * fu) * (1 - fv)
+                  + (d[j0 + 1, i0] * (1 - fu) + d[j0 + 1, i0 + 1] * fu) * fv)
+        return np.where(inside, result, np.nan).astype(np.float32)
+
+    def clearance_at(self, x, z):
+        """Distance au rocher le plus proche en un point, None hors de la grille."""
+        d = self.sample([(x, z)])[0]
+        return None if np.isnan(d) else float(d)
@@ -2,13 +2,89 @@
 
 # --- fichier de description du rover ---
 ROVER_URDF_PATH = 'my-robot/robot.urdf'
+ROVER_ASSET_CACHE_DIR = None # Maillages convertis (.bam). None : dossier assets_cache a cote de l'URDF
+ROVER_ASSET_WORKERS = 2 # Threads de lecture/conversion des maillages du rover (pendant la generation du terrain)
 
 # --- Parametres de Generation du Monde ---
 TERRAIN_SIZE = 50
 TERRAIN_SEGMENTS = 10  # Vous pouvez laisser cette valeur haute maintenant
-VERTICES_PER_FRAME = 2000 # Nombre de points calcules par image. Augmentez pour aller plus vite, baissez si l'UI ralentit.
+TERRAIN_SEED = None # Entier : terrain reproductible et mis en cache. None : graine aleatoire a chaque lancement
+TERRAIN_CACHE_ENABLED = True # Reutilise les hauteurs/normales deja calculees pour les memes parametres
+TERRAIN_CACHE_DIR = 'cache/terrain'
+TERRAIN_BAKE_PATH = None # Terrain precalcule (.rxtb, voir terrain_bake.py). S'il existe, il est charge tel quel au demarrage
+TERRAIN_BAKE_EXPORT = False # True : regenere le terrain et l'ecrit dans TERRAIN_BAKE_PATH
+TERRAIN_NOISE_GRAPH = None # Graphe de bruit declaratif (dict de noeuds, voir noise_graph.py). None : fBm defini ci-dessous
+TERRAIN_WORKERS = None # Processus de calcul du bruit par bandes de lignes (None : un par coeur, 1 : pas de pool)
+TERRAIN_PARALLEL_MIN_SEGMENTS = 2048 # En dessous, le bruit est calcule dans un seul processus
+TERRAIN_OCTAVES = 4 # Nombre d'octaves du bruit fBm
+TERRAIN_BASE_FREQUENCY = 2.5 # Frequence de la premiere octave (divisee par TERRAIN_SIZE)
+TERRAIN_AMPLITUDE = 12 # Amplitude de la premiere octave
+TERRAIN_LACUNARITY = 2.5 # Multiplicateur de frequence entre deux octaves
+TERRAIN_PERSISTENCE = 0.4 # Multiplicateur d'amplitude entre deux octaves
+TERRAIN_BACKEND = 'fbm' # 'fbm' : bruit fractal (ou TERRAIN_NOISE_GRAPH), 'spectral' : synthese FFT (terrain_spectral.py)
+TERRAIN_REGOLITH = None # Preset de REGOLITH_PRESETS pour le backend spectral (None : valeurs ci-dessous)
+SPECTRAL_HURST = 0.8 # Exposant de Hurst (0..1) : plus il est faible, plus la surface est rugueuse
+SPECTRAL_AMPLITUDE = 4.0 # Rugosite RMS : ecart-type des hauteurs
+SPECTRAL_CORNER_WAVELENGTH = None # Au-dela de cette longueur d'onde le spectre est plat (None : TERRAIN_SIZE)
+SPECTRAL_RESOLUTION = None # Cote de la tuile FFT periodique, de periode TERRAIN_SIZE (None : TERRAIN_SEGMENTS)
+REGOLITH_PRESETS = {
+    'mare': {'hurst': 0.9, 'amplitude': 1.5, 'corner_wavelength': 25},       # Plaines basaltiques lisses
+    'highlands': {'hurst': 0.75, 'amplitude': 5.0, 'corner_wavelength': None}, # Relief ondule
+    'ejecta': {'hurst': 0.5, 'amplitude': 3.0, 'corner_wavelength': 10},     # Blocs et ejectas rugueux
+}
+TERRAIN_EROSION = False # Erosion hydraulique puis thermique apres le calcul des hauteurs (terrain_erosion.py)
+EROSION_ITERATIONS = 200 # Passes de ruissellement
+EROSION_THERMAL_ITERATIONS = 100 # Passes d'eboulement
+EROSION_TALUS_ANGLE = 33 # Angle de talus du regolithe (degres)
+EROSION_RAIN = 0.01 # Eau ajoutee par passe
+EROSION_CAPACITY = 1.0 # Capacite de transport de sediments
+EROSION_SOLUBILITY = 0.3 # Vitesse d'arrachement du sol
+EROSION_DEPOSITION = 0.3 # Vitesse de depot des sediments
+EROSION_EVAPORATION = 0.05 # Fraction d'eau evaporee par passe
+EROSION_TIME_BUDGET = 30 # Secondes maximum ; au-dela l'erosion s'arrete et le resultat n'est pas mis en cache
+COLLIDER_TILE_CELLS = 16 # Cellules de grille par cote d'une tuile de collision
+COLLIDER_KEEP_RADIUS = 30 # Les tuiles de collision plus loin que ca de toute entite suivie sont liberees
+
+# --- Terrain par tuiles (mode 'chunked') ---
+TERRAIN_MODE = 'single' # 'single' : un maillage TERRAIN_SIZE x TERRAIN_SIZE, 'chunked' : tuiles chargees autour du rover, 'dem' : tuiles d'un MNT reel
+CHUNK_SIZE = 50 # Cote d'une tuile (unites monde)
+CHUNK_SEGMENTS = 32 # Resolution d'une tuile au LOD 0 (divisee par 2 a chaque LOD)
+CHUNK_LOD_RINGS = (1, 2, 4) # Distance max (en tuiles) de chaque niveau de detail
+CHUNK_VIEW_RADIUS = 4 # Rayon (en tuiles) des tuiles affichees autour du rover
+CHUNK_EVICT_RADIUS = 5 # Les tuiles au-dela de ce rayon sont liberees
+CHUNK_SKIRT_DEPTH = 0.5 # Marge ajoutee sous l'ecart max entre LOD le long des bords (voir terrain_chunks.skirt_depth)
+CHUNK_WORKERS = 2 # Threads de generation des tuiles
+
+# --- MNT reel (mode 'dem', voir terrain_dem.py) ---
+DEM_PATH = 'cache/terrain/dem.rxdem' # MNT tuile et quantifie en int16, lu par memory-map
+DEM_SOURCE = None # Raster .npy ou brut converti en DEM_PATH au demarrage si DEM_PATH n'existe pas
+DEM_RAW_SHAPE = None # (rows, cols) d'un raster brut
+DEM_RAW_DTYPE = '<f4' # Type des valeurs d'un raster brut
+DEM_NODATA = None # Valeur sans donnee du raster (remplacee par l'altitude minimale)
+DEM_SPACING = 1.0 # Metres par pixel du raster
+DEM_TILE = 256 # Cote (en pixels) des tuiles stockees
+DEM_TILE_CACHE = 64 # Tuiles decodees gardees en memoire
+
+# --- Dangers : crateres et rochers (hazards.py) ---
 NUM_OBSTACLES = 0
-OBSTACLE_SAFE_ZONE = 20
+OBSTACLE_SAFE_ZONE = 20 # Rayon autour du point de depart sans obstacle
+OBSTACLE_MIN_SPACING = 3.0 # Distance minimale entre deux rochers (Poisson-disk)
+OBSTACLE_EXCLUSIONS = () # Zones supplementaires sans obstacle : cercles (x, z, rayon)
+OBSTACLE_TILE_SIZE = 25 # Cote des tuiles de rochers fusionnes (un appel de dessin par tuile)
+ROCK_VARIANTS = 4 # Nombre de maillages de rochers differents
+COLLISION_CELL_SIZE = 4 # Cote des cellules de l'index spatial des collisions (rochers, pieces du rover)
+CLEARANCE_CELL_SIZE = 0.25 # Resolution du champ de distance aux obstacles (clearance.py)
+CLEARANCE_MAX_DISTANCE = 10 # Distance au-dela de laquelle le champ est sature
+ROCK_DIAMETER = (1.2, 2.5) # Diametres min/max des rochers
+ROCK_SLOPE = 2.5 # Loi taille-frequence des rochers : N(>D) ~ D^-ROCK_SLOPE
+CRATER_COUNT = 0 # Crateres imprimes dans le relief (0 : aucun)
+CRATER_DIAMETER = (1.0, 12.0) # Diametres min/max des crateres
+CRATER_SLOPE = 2.0 # Loi taille-frequence des crateres : N(>D) ~ D^-CRATER_SLOPE
+CRATER_DEPTH_RATIO = 0.2 # Profondeur du bol / diametre
+
+# --- Budget de temps par image du travail progressif (chargements, pre-construction) ---
+FRAME_BUDGET_MS = 4 # Millisecondes par image consacrees au travail progressif. Augmentez pour aller plus vite, baissez si l'UI ralentit.
+TARGET_FPS = 60 # Cadence visee, rapportee dans les logs avec la duree totale des chargements
 
 # --- Parametres de la Simulation Physique ---
 ROVER_SPEED = 7
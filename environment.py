@@ -1,81 +1,238 @@
 # environment.py
-from ursina import Entity, Mesh, color, Vec3, raycast, invoke
+from ursina import Entity, color
 # --- DEBUT DE LA CORRECTION : Importer le shader ---
 from ursina.shaders import lit_with_shadows_shader
 # --- FIN DE LA CORRECTION ---
-from perlin_noise import PerlinNoise
+from terrain_noise import FractalNoise, grid_axis, parallel_grid
+from noise_graph import NoiseGraph
+from terrain_spectral import SpectralNoise
+from hazards import CrateredNoise, poisson_disk, rock_field
+from obstacles import ObstacleField
+from spatial_index import SpatialHash
+from clearance import ClearanceField
+from terrain_chunks import ChunkedTerrain
+from terrain_cache import TerrainCache
+from terrain_field import TerrainField
+from terrain_collision import TiledTerrainCollider
+from terrain_edit import TerrainEditor
+from terrain_erosion import EROSION_VERSION, erode
+from terrain_dem import DemSource, import_dem
+from terrain_mesh import grid_triangles, grid_normals, grid_vertex_buffer, geom_node
+from terrain_bake import save_bake, load_bake
+import numpy as np
+import os
+import threading
+import queue
 import random
+import time
 import config
 
+def terrain_seed():
+    # Une graine explicite rend le terrain reproductible (et permet de reutiliser le cache)
+    return config.TERRAIN_SEED if config.TERRAIN_SEED is not None else random.randint(1, 1000)
+
+def terrain_noise_from_config():
+    noise = _base_noise_from_config()
+    if config.CRATER_COUNT:
+        noise = CrateredNoise(noise, config.CRATER_COUNT, diameter=config.CRATER_DIAMETER,
+                              slope=config.CRATER_SLOPE, depth_ratio=config.CRATER_DEPTH_RATIO)
+    return noise
+
+def _base_noise_from_config():
+    if config.TERRAIN_BACKEND == 'spectral':
+        preset = config.REGOLITH_PRESETS[config.TERRAIN_REGOLITH] if config.TERRAIN_REGOLITH else {}
+        return SpectralNoise(
+            seed=terrain_seed(), size=config.TERRAIN_SIZE,
+            resolution=config.SPECTRAL_RESOLUTION or config.TERRAIN_SEGMENTS,
+            hurst=preset.get('hurst', config.SPECTRAL_HURST),
+            amplitude=preset.get('amplitude', config.SPECTRAL_AMPLITUDE),
+            corner_wavelength=preset.get('corner_wavelength', config.SPECTRAL_CORNER_WAVELENGTH))
+    # Un graphe de bruit declaratif (voir noise_graph.py) remplace le fBm par defaut s'il est fourni
+    if config.TERRAIN_NOISE_GRAPH:
+        return NoiseGraph(config.TERRAIN_NOISE_GRAPH, seed=terrain_seed(), size=config.TERRAIN_SIZE)
+    return FractalNoise(
+        seed=terrain_seed(), size=config.TERRAIN_SIZE,
+        octaves=config.TERRAIN_OCTAVES, base_frequency=config.TERRAIN_BASE_FREQUENCY,
+        amplitude=config.TERRAIN_AMPLITUDE, lacunarity=config.TERRAIN_LACUNARITY,
+        persistence=config.TERRAIN_PERSISTENCE)
+
+def dem_source_from_config(logger):
+    # Le raster source n'est converti qu'une fois ; ensuite seul le fichier tuile est relu
+    if config.DEM_SOURCE and not os.path.exists(config.DEM_PATH):
+        logger.log(f"Conversion du MNT {config.DEM_SOURCE} -> {config.DEM_PATH}...", "debug")
+        import_dem(config.DEM_SOURCE, config.DEM_PATH, config.DEM_SPACING, shape=config.DEM_RAW_SHAPE,
+                   dtype=config.DEM_RAW_DTYPE, tile=config.DEM_TILE, nodata=config.DEM_NODATA)
+    source = DemSource(config.DEM_PATH, cache_tiles=config.DEM_TILE_CACHE)
+    logger.log(f"MNT {source.cols}x{source.rows} ({source.spacing} m/pixel) ouvert : {config.DEM_PATH}", "debug")
+    return source
+
+def erosion_params():
+    # Parametres de l'erosion, ajoutes a la cle du cache du terrain
+    return dict(
+        iterations=config.EROSION_ITERATIONS, thermal_iterations=config.EROSION_THERMAL_ITERATIONS,
+        talus_angle=config.EROSION_TALUS_ANGLE, rain=config.EROSION_RAIN, capacity=config.EROSION_CAPACITY,
+        solubility=config.EROSION_SOLUBILITY, deposition=config.EROSION_DEPOSITION,
+        evaporation=config.EROSION_EVAPORATION, version=EROSION_VERSION)
+
+def terrain_workers(segments):
+    # Le pool de processus ne vaut son cout de demarrage que pour les grandes grilles
+    if segments < config.TERRAIN_PARALLEL_MIN_SEGMENTS: return 1
+    return config.TERRAIN_WORKERS or os.cpu_count() or 1
+
+class ProgressChannel:
+    """Canal thread-safe : le thread de generation publie, le thread de rendu lit."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._progress = 0.0
+        self._stage = None
+        self._messages = queue.SimpleQueue()
+
+    def report(self, progress, stage=None, message=None, level='debug'):
+        with self._lock:
+            self._progress = progress
+            if stage is not None: self._stage = stage
+        if message: self._messages.put((message, level))
+
+    def poll(self):
+        with self._lock:
+            progress, stage = self._progress, self._stage
+        messages = []
+        while not self._messages.empty():
+            messages.append(self._messages.get())
+        return progress, stage, messages
+
 class TerrainGenerator(Entity):
-    # ... (le debut de la classe est identique) ...
-    def __init__(self, ground_entity, logger, progress_bar, on_complete, **kwargs):
+    def __init__(self, ground_entity, logger, progress_bar, on_complete, noise=None, bake_path=None, **kwargs):
         super().__init__(**kwargs)
         self.ground_entity = ground_entity; self.logger = logger
         self.progress_bar = progress_bar; self.on_complete = on_complete
-        self.logger.log("Demarrage de la generation progressive du terrain...", "debug")
-        self.noise = PerlinNoise(octaves=4, seed=random.randint(1, 1000))
-        self.terrain_mesh = Mesh(vertices=[], triangles=[], normals=[])
-        self.total_vertices = (config.TERRAIN_SEGMENTS + 1) * (config.TERRAIN_SEGMENTS + 1)
-        self.current_vertex = 0; self.last_logged_progress = -1
+        self.bake_path = bake_path  # Terrain precalcule a charger au lieu de le generer
+        self.logger.log("Demarrage de la generation du terrain en arriere-plan...", "debug")
+        self.noise = noise or terrain_noise_from_config()
+        self.seed = self.noise.seed  # Remplacee par celle du bake s'il est charge
+        self.terrain_mesh = None
+        self.field = None  # TerrainField disponible une fois le terrain applique
+        self.terrain_collider = None  # Collider par tuiles, construit a la demande
+        self.editor = None  # TerrainEditor : deformations locales (ornieres, creusement)
+        self.cache = TerrainCache(config.TERRAIN_CACHE_DIR) if config.TERRAIN_CACHE_ENABLED else None
+        self.channel = ProgressChannel()
+        self._started_at = time.perf_counter()
+        self._frames = 0  # Images affichees pendant la generation (cadence rapportee a la fin)
+        self._result = None; self._error = None
+        self._worker = threading.Thread(target=self._build, name='terrain-build', daemon=True)
+        self._worker.start()
+
+    # --- Thread de generation : aucun appel a Ursina/Panda3D ici ---
+    def _build(self):
+        try:
+            if self.bake_path:
+                self._load_bake()
+                return
+            segments = config.TERRAIN_SEGMENTS
+            params = dict(self.noise.params(), segments=segments)
+            if config.TERRAIN_EROSION: params['erosion'] = erosion_params()
+            cached = self.cache.load(params, ('heights', 'normals')) if self.cache else None
+            axis = grid_axis(segments, config.TERRAIN_SIZE)
+            if cached:
+                self.channel.report(0.0, "Chargement du terrain", "Terrain trouve dans le cache, generation ignoree.")
+                heights, normals = cached['heights'], cached['normals']
+            else:
+                self.channel.report(0.0, "Generation des vertices", "Calcul des hauteurs...")
+                heights = parallel_grid(self.noise, axis, axis, terrain_workers(segments))
+                complete = True
+                if config.TERRAIN_EROSION:
+                    heights, complete = self._erode(heights, config.TERRAIN_SIZE / segments)
+                self.channel.report(0.6, "Calcul des normales", "Finalisation... (Calcul des normales)")
+                normals = grid_normals(heights, config.TERRAIN_SIZE / segments).reshape(-1, 3)
+                # Sans graine explicite le terrain ne sera jamais redemande : inutile de le stocker
+                if self.cache and config.TERRAIN_SEED is not None and complete:
+                    entry = self.cache.store(params, heights=heights, normals=normals)
+                    self.channel.report(0.7, message=f"Terrain enregistre dans le cache: {entry}")
+
+            self.channel.report(0.8, "Construction des buffers", "Finalisation... (Creation des triangles)")
+            triangles = grid_triangles(segments)
+            vertex_buffer = grid_vertex_buffer(axis, axis, heights, normals)
+            field = TerrainField.centered(heights, config.TERRAIN_SIZE)
+            if config.TERRAIN_BAKE_EXPORT and config.TERRAIN_BAKE_PATH:
+                save_bake(config.TERRAIN_BAKE_PATH, field, vertex_buffer, triangles, self.seed)
+                self.channel.report(0.9, message=f"Terrain exporte: {config.TERRAIN_BAKE_PATH}")
+            self._result = (field, vertex_buffer, triangles)
+            self.channel.report(1.0, "Finalisation")
+        except Exception as e:
+            self._error = e
 
+    def _erode(self, heights, spacing):
+        self.channel.report(0.4, "Erosion", "Erosion hydraulique et thermique...")
+        params = erosion_params()
+        del params['version']
+        started = time.perf_counter()
+        heights, done = erode(heights, spacing, time_budget=config.EROSION_TIME_BUDGET,
+                              progress=lambda f: self.channel.report(0.4 + 0.2 * f, "Erosion"), **params)
+        planned = params['iterations'] + params['thermal_iterations']
+        if done < planned:
+            # Resultat partiel : il ne correspond pas a la cle de cache, il n'est pas stocke
+            self.channel.report(0.6, message=f"Erosion interrompue par EROSION_TIME_BUDGET ({done}/{planned} passes).")
+        else:
+            self.channel.report(0.6, message=f"Erosion terminee en {time.perf_counter() - started:.2f}s.")
+        return heights, done == planned
+
+    def _load_bake(self):
+        self.channel.report(0.0, "Chargement du terrain", f"Chargement du terrain precalcule: {self.bake_path}")
+        field, positions, normals, triangles, self.seed = load_bake(self.bake_path)
+        vertex_buffer = np.hstack((positions, normals))
+        self._result = (field, vertex_buffer, triangles)
+        self.channel.report(1.0, "Finalisation")
+
+    @property
+    def heights(self):
+        # Toujours celles du champ : TerrainEditor les remplace par une copie modifiable
+        return self.field.heights if self.field else None
+
+    # --- Thread principal : suivi de la progression et echange du modele ---
     def update(self):
-        if self.current_vertex >= self.total_vertices: return
-        limit = min(self.current_vertex + config.VERTICES_PER_FRAME, self.total_vertices)
-        for i in range(self.current_vertex, limit):
-            z_idx = i // (config.TERRAIN_SEGMENTS + 1)
-            x_idx = i % (config.TERRAIN_SEGMENTS + 1)
-            world_x = (x_idx - config.TERRAIN_SEGMENTS / 2) * (config.TERRAIN_SIZE / config.TERRAIN_SEGMENTS)
-            world_z = (z_idx - config.TERRAIN_SEGMENTS / 2) * (config.TERRAIN_SIZE / config.TERRAIN_SEGMENTS)
-            height, frequency, amplitude = 0, 2.5 / config.TERRAIN_SIZE, 12
-            for j in range(4):
-                height += self.noise([world_x * frequency, world_z * frequency]) * amplitude
-                frequency *= 2.5; amplitude *= 0.4
-            self.terrain_mesh.vertices.append(Vec3(world_x, height, world_z))
-        self.current_vertex = limit
-        progress = self.current_vertex / self.total_vertices
+        self._frames += 1
+        progress, stage, messages = self.channel.poll()
+        for message, level in messages:
+            self.logger.log(message, level)
         self.progress_bar.set_progress(progress)
-        progress_percent = int(progress * 100)
-        if progress_percent // 10 > self.last_logged_progress // 10:
-             self.logger.log(f"Generation du terrain : {progress_percent}%")
-             self.last_logged_progress = progress_percent
-        if self.current_vertex >= self.total_vertices:
-            invoke(self.finish_generation, delay=0.01)
-            self.enabled = False
-
-    def finish_generation(self):
-        self.logger.log("Finalisation... (Creation des triangles)", "debug")
-        self.progress_bar.text.text = "Creation des triangles..."
-        width = config.TERRAIN_SEGMENTS + 1
-        for z in range(config.TERRAIN_SEGMENTS):
-            for x in range(config.TERRAIN_SEGMENTS):
-                i = z * width + x
-                self.terrain_mesh.triangles.extend((i, i + 1, i + width))
-                self.terrain_mesh.triangles.extend((i + 1, i + width + 1, i + width))
-        invoke(self.finish_normals_and_collider, delay=0.01)
-        
-    def finish_normals_and_collider(self):
-        self.logger.log("Finalisation... (Calcul des normales)", "debug")
-        self.progress_bar.text.text = "Calcul des normales..."
-        invoke(self._generate_normals, delay=0.01)
+        if stage: self.progress_bar.text.text = f"{stage}... {int(progress * 100)}%"
 
-    def _generate_normals(self):
-        self.terrain_mesh.generate_normals()
-        invoke(self._apply_model, delay=0.01)
+        if self._error is not None:
+            self.logger.log(f"ERREUR lors de la generation du terrain: {self._error}", "error")
+            self.enabled = False
+        elif self._result is not None and not self._worker.is_alive():
+            self._apply_model()
 
     def _apply_model(self):
         self.logger.log("Finalisation... (Application du maillage)", "debug")
-        self.progress_bar.text.text = "Finalisation..."
+        applied_at = time.perf_counter()
+        self.field, vertex_buffer, triangles = self._result
+        self._result = None
+        self.terrain_mesh = geom_node(vertex_buffer, triangles)
         self.ground_entity.model = self.terrain_mesh
-        self.ground_entity.collider = 'mesh'
+        # Pas de collider global : les tuiles sont construites a la premiere requete qui les touche
+        self.terrain_collider = TiledTerrainCollider(self.field, parent=self.ground_entity)
+        self.editor = TerrainEditor(self.field, vertex_buffer, self.terrain_mesh, self.terrain_collider)
         self.ground_entity.color = color.hex('5a6a7a')
         self.ground_entity.receive_shadows = True
         
         # --- DEBUT DE LA CORRECTION : Forcer l'utilisation du bon shader ---
         self.ground_entity.shader = lit_with_shadows_shader
         # --- FIN DE LA CORRECTION ---
-        
-        self.logger.log("Terrain genere avec succes.", "success")
+
+        # Rien a pre-construire : le rover et les obstacles lisent le TerrainField, et les tuiles
+        # de collision sont construites a la premiere requete qui les touche
+        self._complete(time.perf_counter() - applied_at)
+
+    def _complete(self, apply_time):
+        self.enabled = False
+        total = time.perf_counter() - self._started_at
+        # Seule l'application du maillage tourne sur le thread principal, en une image
+        fps = self._frames / total if total > 0 else 0
+        self.logger.log(f"Terrain genere en {total:.2f}s ({self._frames} images, {fps:.0f} img/s, "
+                        f"cible {config.TARGET_FPS} img/s ; application du maillage {apply_time * 1000:.0f} ms, "
+                        f"budget {config.FRAME_BUDGET_MS} ms par image).", "debug")
+        self.logger.log(f"Terrain genere avec succes en {total:.2f}s.", "success")
         if self.on_complete: self.on_complete()
         self.progress_bar.enabled = False
 
@@ -83,27 +240,74 @@ class EnvironmentController:
     # ... (le reste de la classe est identique) ...
     def __init__(self, logger):
         self.logger = logger
-        self.obstacles = []
+        self.obstacles = None  # ObstacleField (voir obstacles.py)
+        self.collision_index = SpatialHash(config.COLLISION_CELL_SIZE)  # Rochers et pieces du rover
+        self.clearance = None  # Distance signee aux rochers (voir clearance.py)
+        self.terrain = None
+        self.noise = None
     def start_terrain_generation(self, ground_entity, progress_bar, on_complete):
-        return TerrainGenerator(
-            ground_entity=ground_entity, logger=self.logger,
-            progress_bar=progress_bar, on_complete=on_complete)
+        # La source de bruit est conservee d'une generation a l'autre : les couches
+        # memorisees d'un graphe de bruit restent valides si on ne modifie qu'un noeud
+        if config.TERRAIN_MODE == 'dem':
+            self.noise = self.noise or dem_source_from_config(self.logger)
+        self.noise = self.noise or terrain_noise_from_config()
+        if config.TERRAIN_BAKE_PATH and not config.TERRAIN_BAKE_EXPORT and os.path.exists(config.TERRAIN_BAKE_PATH):
+            self.terrain = TerrainGenerator(
+                ground_entity=ground_entity, logger=self.logger, progress_bar=progress_bar,
+                on_complete=on_complete, noise=self.noise, bake_path=config.TERRAIN_BAKE_PATH)
+        elif config.TERRAIN_MODE in ('chunked', 'dem'):
+            self.terrain = ChunkedTerrain(
+                ground_entity=ground_entity, noise=self.noise, logger=self.logger,
+                progress_bar=progress_bar, on_complete=on_complete)
+        else:
+            self.terrain = TerrainGenerator(
+                ground_entity=ground_entity, logger=self.logger,
+                progress_bar=progress_bar, on_complete=on_complete, noise=self.noise)
+        return self.terrain
+    @property
+    def field(self):
+        # Requetes de hauteur/normale/pente du terrain courant (None tant qu'il n'est pas pret)
+        return self.terrain.field if self.terrain else None
+    @property
+    def seed(self):
+        # Graine du terrain affiche : celle du bake s'il a ete charge, sinon celle du bruit
+        return getattr(self.terrain, 'seed', self.noise.seed)
+    @property
+    def terrain_collider(self):
+        return getattr(self.terrain, 'terrain_collider', None)
+    @property
+    def editor(self):
+        # Deformation du terrain (terrain unique seulement : les tuiles sont regenerees depuis le bruit)
+        return getattr(self.terrain, 'editor', None)
+    def follow(self, entity):
+        # Le terrain par tuiles se recentre sur cette entite (le rover)
+        if isinstance(self.terrain, ChunkedTerrain): self.terrain.focus = entity
+        # Les tuiles de collision proches de cette entite restent construites
+        if self.terrain_collider: self.terrain_collider.track(entity)
     def place_obstacles(self, ground_entity):
         self.logger.log("Placement des obstacles...")
-        while len(self.obstacles) < config.NUM_OBSTACLES:
-            x = random.uniform(-config.TERRAIN_SIZE / 2, config.TERRAIN_SIZE / 2)
-            z = random.uniform(-config.TERRAIN_SIZE / 2, config.TERRAIN_SIZE / 2)
-            if Vec3(x, 0, z).length() < config.OBSTACLE_SAFE_ZONE: continue
-            hit_info = raycast(origin=Vec3(x, 100, z), direction=Vec3(0, -1, 0), ignore=[], distance=200)
-            if hit_info.hit and hit_info.entity == ground_entity:
-                rock = Entity(
-                    model='sphere', subdivisions=2, scale=random.uniform(1.2, 2.5),
-                    color=color.hex('8c7b6a'), position=hit_info.world_point,
-                    rotation=(random.uniform(0,360), random.uniform(0,360), random.uniform(0,360)),
-                    collider='box', cast_shadows=True,
-                    # Les rochers doivent aussi avoir le bon shader
-                    shader=lit_with_shadows_shader)
-                rock.y -= (random.uniform(0.2, 0.5) * rock.scale_y)
-                self.obstacles.append(rock)
-        self.logger.log(f"{len(self.obstacles)} rochers places.", "success")
+        field = self.field
+        # Positions en Poisson-disk (espacement minimal, zones d'exclusion), puis sous-ensemble
+        # aleatoire : le tirage est borne en temps et ne depend que de la graine du terrain
+        seed = self.seed + 104729
+        exclusions = [(0, 0, config.OBSTACLE_SAFE_ZONE), *config.OBSTACLE_EXCLUSIONS]
+        points = poisson_disk(seed, config.TERRAIN_SIZE, config.OBSTACLE_MIN_SPACING, exclusions)
+        points = points[np.random.default_rng(seed).permutation(len(points))]
+        heights = field.sample(points)
+        valid = ~np.isnan(heights)
+        points, heights = points[valid][:config.NUM_OBSTACLES], heights[valid][:config.NUM_OBSTACLES]
+        if len(points) < config.NUM_OBSTACLES:
+            self.logger.log(f"Seulement {len(points)} emplacements libres pour {config.NUM_OBSTACLES} rochers "
+                            f"(reduire OBSTACLE_MIN_SPACING ?)", "info")
+        # Tailles, orientations et enfoncements tires d'un bloc (loi taille-frequence)
+        rocks = rock_field(seed, len(points), config.TERRAIN_SIZE, diameter=config.ROCK_DIAMETER,
+                           slope=config.ROCK_SLOPE, positions=points)
+        # Un seul noeud de geometrie fusionnee par tuile ; collisions sur les spheres englobantes
+        positions = np.column_stack((points[:, 0], heights - rocks['sink'] * rocks['diameters'], points[:, 1]))
+        self.obstacles = ObstacleField(positions, rocks['diameters'], rocks['rotations'],
+                                       index=self.collision_index)
+        # Tenu a jour par l'ObstacleField quand des rochers sont ajoutes ou retires
+        self.clearance = ClearanceField(self.obstacles, config.TERRAIN_SIZE,
+                                        config.CLEARANCE_CELL_SIZE, config.CLEARANCE_MAX_DISTANCE)
+        self.logger.log(f"{self.obstacles.count} rochers places en {len(self.obstacles.tiles)} tuiles.", "success")
         return self.obstacles
\ No newline at end of file
@@ -0,0 +1,165 @@
+# hazards.py
+# Champs de dangers (crateres, rochers) tires en tableaux selon des lois de puissance
+# taille-frequence, et impression vectorisee des crateres dans une grille de hauteurs.
+# Tout est calcule par lots numpy : 10^5 elements se traitent en quelques secondes.
+import numpy as np
+
+
+def powerlaw_sizes(rng, count, d_min, d_max, slope):
+    """Diametres tires selon une loi cumulative N(>D) ~ D^-slope, tronquee a [d_min, d_max]."""
+    u = rng.random(count)
+    a, b = d_min ** -slope, d_max ** -slope
+    return (a - u * (a - b)) ** (-1 / slope)
+
+
+def crater_field(seed, count, size, diameter=(1.0, 12.0), slope=2.0, depth_ratio=0.2):
+    """Crateres repartis uniformement sur [-size/2, size/2]^2.
+
+    Retourne (centers (N, 2), radii (N,), depths (N,)) ; la profondeur du bol vaut
+    `depth_ratio` fois le diametre.
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.uniform(-size / 2, size / 2, size=(count, 2))
+    diameters = powerlaw_sizes(rng, count, diameter[0], diameter[1], slope)
+    return centers, diameters / 2, depth_ratio * diameters
+
+
+def rock_field(seed, count, size, diameter=(1.2, 2.5), slope=2.5, positions=None):
+    """Rochers repartis uniformement sur [-size/2, size/2]^2 (ou aux `positions` donnees).
+
+    Retourne un dict de tableaux : positions (N, 2), diameters (N,), rotations (N, 3) en degres
+    et sink (N,), fraction du diametre enfoncee dans le sol.
+    """
+    rng = np.random.default_rng(seed)
+    if positions is None:
+        positions = rng.uniform(-size / 2, size / 2, size=(count, 2))
+    count = len(positions)
+    return dict(
+        positions=np.asarray(positions, dtype=np.float64),
+        diameters=powerlaw_sizes(rng, count, diameter[0], diameter[1], slope),
+        rotations=rng.uniform(0, 360, size=(count, 3)),
+        sink=rng.uniform(0.2, 0.5, size=count))
+
+
+def poisson_disk(seed, size, spacing, exclusions=(), attempts=30):
+    """Points separes d'au moins `spacing` sur [-size/2, size/2]^2 (Poisson-disk par grille).
+
+    Grille de cellules de cote spacing / sqrt(2), au plus un point par cellule. Les cellules
+    sont traitees par phases (indices modulo 3) : deux cellules d'une meme phase sont trop
+    eloignees pour entrer en conflit, donc chaque phase tire un point dans toutes ses cellules
+    vides d'un seul bloc et le teste contre les 5 x 5 cellules voisines. `attempts` tours de
+    9 phases : le temps est borne et le resultat ne depend que de `seed`.
+    `exclusions` : cercles (x, z, rayon) ou aucun point n'est place. Retourne un tableau (N, 2).
+    """
+    rng = np.random.default_rng(seed)
+    half = size / 2
+    cell = spacing / np.sqrt(2)
+    cells = max(1, int(np.ceil(size / cell)))
+    grid = np.full((cells + 4, cells + 4), -1, dtype=np.int64)  # Bordure de 2 cellules vides
+    points = np.zeros((cells * cells, 2))  # Lignes non ecrites lues (masquees) via np.maximum(ids, 0)
+    exclusions = np.asarray(exclusions, dtype=np.float64).reshape(-1, 3)
+    offsets = np.stack(np.meshgrid(np.arange(-2, 3), np.arange(-2, 3), indexing='ij'), axis=-1).reshape(-1, 2)
+    count = 0
+
+    for _ in range(attempts):
+        for phase_z in range(3):
+            for phase_x in range(3):
+                block = grid[2 + phase_z:2 + cells:3, 2 + phase_x:2 + cells:3]
+                gz, gx = np.nonzero(block < 0)
+                if not len(gz): continue
+                gz, gx = gz * 3 + phase_z, gx * 3 + phase_x
+                darts = (np.stack([gx, gz], axis=1) + rng.random((len(gz), 2))) * cell - half
+                ok = np.all(darts < half, axis=1)
+                for ex, ez, radius in exclusions:
+                    ok &= (darts[:, 0] - ex) ** 2 + (darts[:, 1] - ez) ** 2 >= radius * radius
+                ids = grid[gz[:, None] + 2 + offsets[:, 0], gx[:, None] + 2 + offsets[:, 1]]
+                d2 = ((points[np.maximum(ids, 0)] - darts[:, None, :]) ** 2).sum(axis=-1)
+                ok &= np.all((ids < 0) | (d2 >= spacing * spacing), axis=1)
+                accepted = np.flatnonzero(ok)
+                new = np.arange(count, count + len(accepted))
+                points[new] = darts[accepted]
+                grid[gz[accepted] + 2, gx[accepted] + 2] = new
+                count += len(accepted)
+    return points[:count].copy()
+
+
+def crater_profile(r, depths):
+    """Profil radial (r = distance / rayon) : bol parabolique et bourrelet autour de r = 1."""
+    bowl = np.where(r < 1, depths * (r * r - 1), 0)
+    rim = np.where(r < 2, depths * 0.25 * np.exp(-((r - 1) / 0.35) ** 2), 0)
+    return bowl + rim
+
+
+def _window(axis, centers, reach):
+    # Plage d'indices [i0, i1) de l'axe regulier `axis` couverte par [c - reach, c + reach)
+    step = axis[1] - axis[0] if len(axis) > 1 else 1.0
+    i0 = np.ceil((centers - reach - axis[0]) / step)
+    i1 = np.ceil((centers + reach - axis[0]) / step)
+    return np.clip(i0, 0, len(axis)).astype(np.int64), np.clip(i1, 0, len(axis)).astype(np.int64)
+
+
+def window_pairs(xs, zs, centers, reach, max_pairs=1 << 22):
+    """Paires (element, cellule) de la grille (zs x xs, axes reguliers) a moins de `reach` de chaque centre.
+
+    Genere des paquets (owner, ii, jj) d'au plus `max_pairs` paires (au moins un element par
+    paquet) : indice de l'element, colonne et ligne de la cellule. Les elements hors de la
+    grille sont ignores.
+    """
+    i0, i1 = _window(xs, centers[:, 0], reach)
+    j0, j1 = _window(zs, centers[:, 1], reach)
+    widths, counts = i1 - i0, (i1 - i0) * (j1 - j0)
+    keep = np.flatnonzero(counts > 0)
+    ends = np.cumsum(counts[keep])
+    start = 0
+    while start < len(keep):
+        base = ends[start - 1] if start else 0
+        stop = max(start + 1, int(np.searchsorted(ends, base + max_pairs, side='right')))
+        k = keep[start:stop]
+        n = counts[k]
+        owner = np.repeat(k, n)
+        local = np.arange(int(n.sum())) - np.repeat(np.cumsum(n) - n, n)
+        yield owner, i0[owner] + local % widths[owner], j0[owner] + local // widths[owner]
+        start = stop
+
+
+def stamp_craters(heights, xs, zs, centers, radii, depths, max_pairs=1 << 22):
+    """Ajoute les crateres a `heights` (zs x xs, axes reguliers), en place.
+
+    Chaque cratere couvre une fenetre de cellules de rayon 2R ; toutes les paires
+    (cratere, cellule) sont evaluees d'un bloc, par paquets d'au plus `max_pairs`,
+    puis accumulees dans la grille. Les crateres hors de la grille sont ignores, ce qui
+    permet d'imprimer le meme champ de crateres bande par bande ou tuile par tuile.
+    """
+    xs = np.asarray(xs, dtype=np.float64)
+    zs = np.asarray(zs, dtype=np.float64)
+    rows, cols = len(zs), len(xs)
+    flat = heights.reshape(-1)
+    for owner, ii, jj in window_pairs(xs, zs, centers, 2 * np.asarray(radii, dtype=np.float64), max_pairs):
+        r = np.hypot(xs[ii] - centers[owner, 0], zs[jj] - centers[owner, 1]) / radii[owner]
+        flat += np.bincount(jj * cols + ii, weights=crater_profile(r, depths[owner]),
+                            minlength=rows * cols).astype(flat.dtype, copy=False)
+    return heights
+
+
+class CrateredNoise:
+    """Source de hauteurs `base` (FractalNoise, NoiseGraph, SpectralNoise...) marquee de crateres.
+
+    Le champ de crateres est tire une fois depuis la graine ; `grid` n'imprime que ceux qui
+    touchent la grille demandee, donc le resultat est le meme en un bloc, par bandes ou par tuiles.
+    """
+
+    def __init__(self, base, count, diameter=(1.0, 12.0), slope=2.0, depth_ratio=0.2):
+        self.base = base
+        self.seed = base.seed
+        self.size = base.size
+        self.parallel = getattr(base, 'parallel', True)
+        self.crater_params = dict(count=count, diameter=list(diameter), slope=slope, depth_ratio=depth_ratio)
+        self.centers, self.radii, self.depths = crater_field(
+            self.seed + 7919, count, self.size, diameter, slope, depth_ratio)
+
+    def params(self):
+        return dict(self.base.params(), craters=self.crater_params)
+
+    def grid(self, xs, zs):
+        heights = self.base.grid(xs, zs).astype(np.float32)
+        return stamp_craters(heights, xs, zs, self.centers, self.radii, self.depths)
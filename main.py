@@ -4,6 +4,7 @@ from ursina.prefabs.editor_camera import EditorCamera
 from logger import LogWindow
 from environment import EnvironmentController
 from rover import Rover
+from rover_assets import start_loading
 import config
 
 class ProgressBar(Entity):
@@ -28,6 +29,8 @@ if __name__ == '__main__':
     log_window = LogWindow()
     progress_bar = ProgressBar()
     log_window.log("Application initialisee.")
+    # URDF et maillages du rover prepares en arriere-plan pendant la generation du terrain
+    rover_assets = start_loading(config.ROVER_URDF_PATH, config.ROVER_ASSET_CACHE_DIR, config.ROVER_ASSET_WORKERS)
     env_controller = EnvironmentController(logger=log_window)
 
     def start_simulation():
@@ -46,8 +49,11 @@ if __name__ == '__main__':
             obstacles=obstacles, 
             logger=log_window, 
             position=safe_spawn_pos,
-            urdf_path=config.ROVER_URDF_PATH # Nouvel argument
+            terrain_field=env_controller.field,
+            urdf_path=config.ROVER_URDF_PATH, # Nouvel argument
+            assets=rover_assets
         )
+        env_controller.follow(rover)
             
         log_window.log("Simulation prete. Deplacement : fleches.", "success")
 
@@ -0,0 +1,195 @@
+# noise_graph.py
+# Graphe de bruit declaratif pour composer le relief (fbm, ridged, billow, warp, spectral, crateres...).
+# Chaque noeud est evalue sur la grille entiere en operations numpy, et le resultat de chaque
+# noeud est memorise : modifier un noeud ne recalcule que ce noeud et ceux qui en dependent.
+#
+# Exemple (config.TERRAIN_NOISE_GRAPH) :
+#   {
+#       'base':   {'op': 'fbm', 'octaves': 4, 'frequency': 2.5, 'amplitude': 12},
+#       'ridges': {'op': 'ridged', 'seed': 1, 'octaves': 5, 'frequency': 1.5, 'amplitude': 6},
+#       'mix':    {'op': 'add', 'inputs': ['base', 'ridges'], 'weights': [1, 0.5]},
+#       'output': {'op': 'clamp', 'inputs': ['mix'], 'min': -10},
+#   }
+# Les frequences sont exprimees en cycles par TERRAIN_SIZE, comme TERRAIN_BASE_FREQUENCY.
+# `seed` d'un noeud est un decalage ajoute a la graine du terrain.
+# Un noeud 'spectral' exige `resolution` (cote de sa tuile FFT) : une valeur tiree de la grille
+# evaluee donnerait d'autres hauteurs par tuile, par LOD et par bande de calcul parallele.
+from collections import OrderedDict
+import hashlib
+import json
+import threading
+import numpy as np
+from terrain_noise import GradientNoise
+from terrain_spectral import SpectralNoise
+from hazards import crater_field, stamp_craters
+
+# A incrementer des que le resultat d'un operateur change (sert de cle de cache disque).
+NOISE_GRAPH_VERSION = 2
+
+
+def _fractal(noise, x, z, kind, octaves=4, frequency=2.5, amplitude=12.0, lacunarity=2.5,
+             persistence=0.4, size=1.0):
+    heights = np.zeros(np.broadcast_shapes(np.shape(x), np.shape(z)), dtype=np.float32)
+    frequency = frequency / size
+    for _ in range(octaves):
+        n = noise.sample(x * frequency, z * frequency)
+        if kind == 'ridged':
+            n = (1 - 2 * np.abs(n)) ** 2    # Cretes vives la ou le bruit passe par zero
+        elif kind == 'billow':
+            n = 2 * np.abs(n) - 0.5          # Bosses arrondies
+        heights += n * np.float32(amplitude)
+        frequency *= lacunarity
+        amplitude *= persistence
+    return heights
+
+
+_FRACTAL_PARAMS = ('octaves', 'frequency', 'amplitude', 'lacunarity', 'persistence')
+
+
+def _checked(name, spec):
+    spec = dict(spec)
+    if spec.get('op') == 'spectral' and not spec.get('resolution'):
+        raise ValueError(f"Graphe de bruit: noeud spectral '{name}' sans 'resolution'")
+    return spec
+
+
+class NoiseGraph:
+    """Graphe de noeuds nommes ; `output` est le noeud dont le resultat donne les hauteurs.
+
+    Expose la meme interface que terrain_noise.FractalNoise (`grid`, `params`, `seed`, `size`)
+    et peut donc le remplacer partout (TerrainGenerator, tuiles, pool de processus).
+    """
+
+    def __init__(self, nodes, seed, size, output='output', memo_size=16):
+        self.nodes = {name: _checked(name, spec) for name, spec in nodes.items()}
+        self.seed = seed
+        self.size = size
+        self.output = output
+        self.memo_size = memo_size
+        self._memo = OrderedDict()  # signature -> tableau float32 (lecture seule)
+        self._noises = {}
+        self.recomputed = []        # Noeuds recalcules lors de la derniere evaluation
+        self._lock = threading.Lock()  # Memo et bruits partages par les threads de tuiles
+        if output not in self.nodes:
+            raise ValueError(f"Graphe de bruit: noeud de sortie '{output}' absent")
+
+    def __getstate__(self):
+        # Les resultats memorises ne sont pas envoyes aux processus de travail
+        state = self.__dict__.copy()
+        state['_memo'] = OrderedDict()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def params(self):
+        return dict(graph=self.nodes, output=self.output, seed=self.seed, size=self.size,
+                    graph_version=NOISE_GRAPH_VERSION)
+
+    def set_node(self, name, spec):
+        """Remplace (ou ajoute) un noeud ; seuls lui et ses dependants seront recalcules."""
+        self.nodes[name] = _checked(name, spec)
+
+    def update_node(self, name, **params):
+        self.nodes[name] = _checked(name, dict(self.nodes[name], **params))
+
+    # --- Evaluation ---
+    def grid(self, xs, zs):
+        """Hauteurs (float32) sur la grille produit (zs x xs), en coordonnees monde."""
+        xs = np.asarray(xs, dtype=np.float64)
+        zs = np.asarray(zs, dtype=np.float64)
+        grid_key = hashlib.sha1(xs.tobytes() + b'|' + zs.tobytes()).hexdigest()
+        recomputed = []
+        result = self._evaluate(self.output, xs, zs, grid_key, {}, (), recomputed)[1].copy()
+        self.recomputed = recomputed
+        return result
+
+    def _evaluate(self, name, xs, zs, grid_key, done, stack, recomputed):
+        if name in done: return done[name]
+        if name in stack:
+            raise ValueError(f"Graphe de bruit: cycle via '{name}'")
+        spec = self.nodes.get(name)
+        if spec is None:
+            raise ValueError(f"Graphe de bruit: noeud '{name}' inconnu")
+
+        inputs = [self._evaluate(i, xs, zs, grid_key, done, stack + (name,), recomputed) for i in spec.get('inputs', ())]
+        signature = hashlib.sha1(json.dumps(
+            [spec, [sig for sig, _ in inputs], self.seed, self.size, grid_key],
+            sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+        with self._lock:
+            result = self._memo.get(signature)
+            if result is not None: self._memo.move_to_end(signature)
+        if result is None:
+            # Calcul hors verrou : deux threads peuvent calculer le meme noeud, le resultat est identique
+            result = self._apply(spec, xs, zs, [array for _, array in inputs]).astype(np.float32, copy=False)
+            result.flags.writeable = False
+            with self._lock:
+                self._memo[signature] = result
+                if len(self._memo) > self.memo_size: self._memo.popitem(last=False)
+            recomputed.append(name)
+        done[name] = (signature, result)
+        return done[name]
+
+    def _noise(self, spec):
+        seed = self.seed + spec.get('seed', 0)
+        with self._lock:
+            if seed not in self._noises: self._noises[seed] = GradientNoise(seed)
+            return self._noises[seed]
+
+    def _apply(self, spec, xs, zs, inputs):
+        op = spec['op']
+        x, z = xs[None, :], zs[:, None]
+        if op in ('fbm', 'ridged', 'billow'):
+            params = {k: spec[k] for k in _FRACTAL_PARAMS if k in spec}
+            return _fractal(self._noise(spec), x, z, op, size=self.size, **params)
+        if op == 'warp':
+            # Deformation du domaine : `source` (un noeud fractal) est evalue en (x + dx, z + dz)
+            warp = dict(spec.get('warp', {}))
+            strength = spec.get('strength', 4.0)
+            warp_x = _fractal(self._noise(warp), x, z, 'fbm', size=self.size,
+                              **{k: warp[k] for k in _FRACTAL_PARAMS if k in warp})
+            warp_z = _fractal(self._noise(dict(warp, seed=warp.get('seed', 0) + 101)), x, z, 'fbm',
+                              size=self.size, **{k: warp[k] for k in _FRACTAL_PARAMS if k in warp})
+            source = spec['source']
+            return _fractal(self._noise(source), x + strength * warp_x, z + strength * warp_z,
+                            source.get('op', 'fbm'), size=self.size,
+                            **{k: source[k] for k in _FRACTAL_PARAMS if k in source})
+        if op == 'spectral':
+            # Surface fractale FFT, periodique sur TERRAIN_SIZE (voir terrain_spectral.py)
+            noise = SpectralNoise(self.seed + spec.get('seed', 0), self.size,
+                                  spec['resolution'], spec.get('hurst', 0.8),
+                                  spec.get('amplitude', 4.0), spec.get('corner_wavelength'))
+            return noise.grid(xs, zs)
+        if op == 'craters':
+            return self._craters(spec, xs, zs)
+        if op == 'add':
+            weights = spec.get('weights', [1.0] * len(inputs))
+            return sum(np.float32(w) * a for w, a in zip(weights, inputs))
+        if op == 'multiply':
+            result = inputs[0]
+            for a in inputs[1:]: result = result * a
+            return result
+        if op == 'scale':
+            return inputs[0] * np.float32(spec.get('factor', 1.0)) + np.float32(spec.get('offset', 0.0))
+        if op == 'clamp':
+            return np.clip(inputs[0], spec.get('min', -np.inf), spec.get('max', np.inf))
+        if op == 'blend':
+            # inputs = [a, b, masque] ; le masque est ramene a [0, 1] entre `low` et `high`
+            low, high = spec.get('low', 0.0), spec.get('high', 1.0)
+            t = np.clip((inputs[2] - low) / (high - low), 0, 1)
+            return inputs[0] + t * (inputs[1] - inputs[0])
+        raise ValueError(f"Graphe de bruit: operateur '{op}' inconnu")
+
+    def _craters(self, spec, xs, zs):
+        # Crateres a bol parabolique et bourrelet, places sur tout le terrain (TERRAIN_SIZE),
+        # rayons tires selon une loi de puissance (voir hazards.py)
+        r_min, r_max = spec.get('radius', (1.0, 6.0))
+        centers, radii, depths = crater_field(
+            self.seed + spec.get('seed', 0), spec.get('count', 20), self.size,
+            diameter=(2 * r_min, 2 * r_max), slope=spec.get('slope', 2.0),
+            depth_ratio=spec.get('depth', 0.3) / 2)
+        heights = np.zeros((len(zs), len(xs)), dtype=np.float32)
+        return stamp_craters(heights, xs, zs, centers, radii, depths)
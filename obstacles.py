@@ -0,0 +1,197 @@
+# obstacles.py
+# Rendu groupe des rochers : quelques maillages de rochers, fusionnes par tuile en une
+# geometrie statique (un noeud et un appel de dessin par tuile au lieu d'un par rocher).
+# Les collisions passent par des tableaux compacts de spheres englobantes, sans collider Panda3D.
+from ursina import Entity, color, destroy
+from ursina.shaders import lit_with_shadows_shader
+from terrain_mesh import grid_triangles, index_dtype, geom_node
+from spatial_index import SpatialHash
+import numpy as np
+import config
+
+
+def rock_mesh(seed, segments=8, flatten=0.7):
+    """Maillage d'un rocher : sphere deformee par quelques lobes aleatoires, un peu aplatie.
+
+    Retourne (vertex_buffer (N, 6) 'p3f,n3f' float32, indices), rayon ~0.5 comme model='sphere'.
+    """
+    rng = np.random.default_rng(seed)
+    width = segments + 1
+    lon = np.linspace(0, 2 * np.pi, width)[None, :]
+    lat = np.linspace(-np.pi / 2, np.pi / 2, width)[:, None]
+    directions = np.stack(np.broadcast_arrays(np.cos(lat) * np.cos(lon), np.sin(lat), np.cos(lat) * np.sin(lon)),
+                          axis=-1).reshape(-1, 3)
+    lobes = rng.normal(size=(6, 3))
+    lobes /= np.linalg.norm(lobes, axis=1, keepdims=True)
+    radius = 0.5 * (1 + (rng.uniform(0.04, 0.12, 6) * np.cos(rng.uniform(2, 5, 6) * (directions @ lobes.T)
+                                                            + rng.uniform(0, 2 * np.pi, 6))).sum(axis=1))
+    positions = directions * radius[:, None] * np.array([1, flatten, 1])
+
+    triangles = grid_triangles(segments, np.uint32).reshape(-1, 3)
+    a, b, c = positions[triangles[:, 0]], positions[triangles[:, 1]], positions[triangles[:, 2]]
+    faces = np.cross(c - a, b - a)
+    if (faces * (a + b + c)).sum() < 0:  # Faces tournees vers l'exterieur
+        triangles = triangles[:, ::-1]
+        faces = -faces
+
+    # Normales lissees, soudees sur la couture de longitude et aux poles (sommets confondus)
+    _, welded = np.unique(np.round(positions, 6), axis=0, return_inverse=True)
+    welded = welded.ravel()
+    normals = np.zeros((welded.max() + 1, 3))
+    for corner in range(3):
+        np.add.at(normals, welded[triangles[:, corner]], faces)
+    normals = normals[welded]
+    normals /= np.maximum(np.linalg.norm(normals, axis=1, keepdims=True), 1e-12)
+
+    vertex_buffer = np.concatenate((positions, normals), axis=1).astype(np.float32)
+    return vertex_buffer, triangles.ravel().astype(index_dtype(len(vertex_buffer)))
+
+
+def rotation_matrices(rotations):
+    """Matrices (N, 3, 3) des angles d'Euler (N, 3) en degres, appliques dans l'ordre x, y, z."""
+    rx, ry, rz = np.radians(np.asarray(rotations, dtype=np.float64)).T
+    cx, sx, cy, sy, cz, sz = np.cos(rx), np.sin(rx), np.cos(ry), np.sin(ry), np.cos(rz), np.sin(rz)
+    one, zero = np.ones_like(rx), np.zeros_like(rx)
+    mx = np.stack([one, zero, zero, zero, cx, -sx, zero, sx, cx], axis=-1).reshape(-1, 3, 3)
+    my = np.stack([cy, zero, sy, zero, one, zero, -sy, zero, cy], axis=-1).reshape(-1, 3, 3)
+    mz = np.stack([cz, -sz, zero, sz, cz, zero, zero, zero, one], axis=-1).reshape(-1, 3, 3)
+    return mz @ my @ mx
+
+
+def merge_instances(vertex_buffer, indices, positions, rotations, scales):
+    """Fusionne N copies transformees d'un maillage en un seul (vertex_buffer, indices)."""
+    count, n = len(positions), len(vertex_buffer)
+    matrices = rotation_matrices(rotations)
+    merged = np.empty((count, n, 6), dtype=np.float32)
+    merged[..., :3] = np.einsum('kij,nj->kni', matrices * np.asarray(scales)[:, None, None], vertex_buffer[:, :3]) \
+        + np.asarray(positions)[:, None, :]
+    merged[..., 3:] = np.einsum('kij,nj->kni', matrices, vertex_buffer[:, 3:])
+    dtype = index_dtype(count * n)
+    offsets = (np.arange(count, dtype=np.uint32) * n)[:, None]
+    return merged.reshape(-1, 6), (indices.astype(np.uint32)[None, :] + offsets).ravel().astype(dtype)
+
+
+class ObstacleField(Entity):
+    """Rochers rendus par tuiles de geometrie fusionnee, avec spheres englobantes compactes.
+
+    `centers` (N, 3) et `radii` (N,) decrivent les rochers pour les collisions ; aucun
+    rocher n'a d'entite ni de collider propre. `add` et `remove` ne reconstruisent que les
+    tuiles touchees et previennent les `listeners` (champ de distance, etc.).
+    """
+
+    def __init__(self, positions, diameters, rotations, variants=None, tile_size=None, index=None, **kwargs):
+        super().__init__(**kwargs)
+        self.tile_size = tile_size or config.OBSTACLE_TILE_SIZE
+        self.meshes = [rock_mesh(seed) for seed in range(config.ROCK_VARIANTS)]
+        # Spheres englobantes : le centre du rocher et le plus grand rayon du maillage mis a l'echelle
+        self.extents = np.array([np.linalg.norm(vb[:, :3], axis=1).max() for vb, _ in self.meshes], dtype=np.float32)
+        self.positions = np.zeros((0, 3), dtype=np.float32)
+        self.diameters = np.zeros(0, dtype=np.float32)
+        self.rotations = np.zeros((0, 3), dtype=np.float32)
+        self.variants = np.zeros(0, dtype=np.uint8)
+        self.radii = np.zeros(0, dtype=np.float32)
+        self.alive = np.zeros(0, dtype=bool)  # Les rochers retires gardent leur indice
+        # Phase large partagee avec les pieces du rover (voir spatial_index.py) ; cles entieres = rochers
+        self.index = index if index is not None else SpatialHash(config.COLLISION_CELL_SIZE)
+        self.tiles = {}      # (tx, tz) -> Entite de la geometrie fusionnee
+        self.listeners = []  # Appeles avec (indices ajoutes, indices retires) apres chaque modification
+        self.add(positions, diameters, rotations, variants)
+
+    @property
+    def centers(self):
+        return self.positions
+
+    @property
+    def count(self):
+        return int(self.alive.sum())
+
+    def _tile_keys(self, indices):
+        return {(int(tx), int(tz)) for tx, tz in np.floor(self.positions[indices][:, [0, 2]] / self.tile_size)}
+
+    def add(self, positions, diameters, rotations, variants=None):
+        """Ajoute des rochers ; seules les tuiles qui les contiennent sont reconstruites. Retourne leurs indices."""
+        positions = np.asarray(positions, dtype=np.float32).reshape(-1, 3)
+        start, count = len(self.positions), len(positions)
+        if variants is None: variants = np.arange(start, start + count) % len(self.meshes)
+        variants = np.asarray(variants, dtype=np.uint8)
+        diameters = np.asarray(diameters, dtype=np.float32)
+        self.positions = np.concatenate((self.positions, positions))
+        self.diameters = np.concatenate((self.diameters, diameters))
+        self.rotations = np.concatenate((self.rotations, np.asarray(rotations, dtype=np.float32).reshape(-1, 3)))
+        self.variants = np.concatenate((self.variants, variants))
+        self.radii = np.concatenate((self.radii, self.extents[variants] * diameters))
+        self.alive = np.concatenate((self.alive, np.ones(count, dtype=bool)))
+        added = np.arange(start, start + count)
+        reach = self.radii[added, None]
+        self.index.insert_many(added.tolist(), positions - reach, positions + reach)
+        self._build_tiles(self._tile_keys(added))
+        for listener in self.listeners: listener(added, added[:0])
+        return added
+
+    def remove(self, indices):
+        """Retire des rochers (indices stables) ; seules leurs tuiles sont reconstruites."""
+        indices = np.asarray(indices, dtype=np.int64)
+        indices = indices[self.alive[indices]]
+        self.alive[indices] = False
+        for i in indices.tolist(): self.index.remove(i)
+        self._build_tiles(self._tile_keys(indices))
+        for listener in self.listeners: listener(indices[:0], indices)
+
+    def _build_tiles(self, keys):
+        # Rochers vivants groupes par tuile (un tri) ; seules les tuiles `keys` sont reconstruites
+        alive = np.flatnonzero(self.alive)
+        tiles = np.floor(self.positions[alive][:, [0, 2]] / self.tile_size).astype(np.int64)
+        order = np.lexsort((tiles[:, 1], tiles[:, 0]))
+        unique, starts = np.unique(tiles[order], axis=0, return_index=True)
+        groups = {(int(tx), int(tz)): alive[members]
+                  for (tx, tz), members in zip(unique, np.split(order, starts[1:]))}
+        for key in keys:
+            if key in self.tiles: destroy(self.tiles.pop(key))
+            members = groups.get(key)
+            if members is None: continue
+            buffers, offset = [], 0
+            for variant, (vertex_buffer, indices) in enumerate(self.meshes):
+                chosen = members[self.variants[members] == variant]
+                if not len(chosen): continue
+                vb, ib = merge_instances(vertex_buffer, indices, self.positions[chosen],
+                                         self.rotations[chosen], self.diameters[chosen])
+                buffers.append((vb, ib.astype(np.uint32) + offset))
+                offset += len(vb)
+            vertex_buffer = np.concatenate([vb for vb, _ in buffers])
+            indices = np.concatenate([ib for _, ib in buffers]).astype(index_dtype(len(vertex_buffer)))
+            self.tiles[key] = Entity(
+                parent=self, name=f'obstacles_{key[0]}_{key[1]}',
+                model=geom_node(vertex_buffer, indices, name='obstacles'),
+                color=color.hex('8c7b6a'), cast_shadows=True, shader=lit_with_shadows_shader)
+
+    # --- Requetes de collision : phase large par l'index spatial, phase fine sur les spheres ---
+    def nearby(self, lo, hi):
+        """Indices des rochers dont la boite englobante chevauche la boite (lo, hi)."""
+        return np.array(self.index.query(lo, hi, exclude=lambda key: not isinstance(key, int)), dtype=np.int64)
+
+    def overlapping_sphere(self, center, radius):
+        """Indices des rochers dont la sphere englobante touche la sphere (center, radius)."""
+        center = np.asarray(center, dtype=np.float32)
+        candidates = self.nearby(center - radius, center + radius)
+        d2 = ((self.centers[candidates] - center) ** 2).sum(axis=1)
+        return candidates[d2 < (self.radii[candidates] + radius) ** 2]
+
+    def hits_sphere(self, center, radius):
+        return len(self.overlapping_sphere(center, radius)) > 0
+
+    def overlapping_box(self, center, half_extents):
+        """Indices des rochers dont la sphere englobante touche la boite alignee (center, half_extents)."""
+        center = np.asarray(center, dtype=np.float32)
+        half_extents = np.asarray(half_extents, dtype=np.float32)
+        candidates = self.nearby(center - half_extents, center + half_extents)
+        delta = np.abs(self.centers[candidates] - center) - half_extents
+        d2 = (np.maximum(delta, 0) ** 2).sum(axis=1)
+        return candidates[d2 < self.radii[candidates] ** 2]
+
+    def hits_box(self, center, half_extents):
+        return len(self.overlapping_box(center, half_extents)) > 0
+
+    def on_destroy(self):
+        for key in np.flatnonzero(self.alive).tolist(): self.index.remove(key)
+        for tile in self.tiles.values(): destroy(tile)
+        self.tiles.clear()
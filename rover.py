@@ -1,90 +1,117 @@
 # rover.py
-from ursina import Entity, color, Vec3, Quat, lerp, slerp, raycast, held_keys, time, destroy, load_model, invoke
+from ursina import Entity, color, Vec3, Vec4, Quat, lerp, slerp, held_keys, time, destroy, scene
 from ursina.shaders import lit_with_shadows_shader
-from urdf_parser_py.urdf import URDF
+from panda3d.core import Mat4
+from rover_assets import start_loading
 import numpy as np
 import config
-import os
 
 class Rover(Entity):
-    def __init__(self, ground, obstacles, logger, urdf_path, **kwargs):
+    def __init__(self, ground, obstacles, logger, urdf_path, terrain_field=None, assets=None, **kwargs):
         # L'entité Rover elle-même est maintenant un conteneur vide.
         super().__init__(**kwargs)
         
         self.ground = ground
-        self.obstacles = obstacles
+        self.obstacles = obstacles  # ObstacleField : collisions sur des spheres englobantes (voir obstacles.py)
         self.logger = logger
         self.urdf_path = urdf_path
+        self.terrain_field = terrain_field  # Requetes de hauteur/normale sans raycast (voir terrain_field.py)
         
         self.links = {}  # Dictionnaire pour stocker les entités de chaque "link"
         self.joints = {} # Dictionnaire pour stocker les infos des "joints"
+        self.collision_boxes = []  # (cle d'index, entite du link, centre local, taille locale) par <collision>
+        self.root_link_name = None  # Link racine de l'URDF (le chassis), connu apres le parsing
         
         self.logger.log(f"Chargement du fichier URDF: {urdf_path}", "info")
         
-        # Le chargement est différé pour s'assurer que l'environnement est prêt
-        invoke(self.build_from_urdf, delay=0.01)
+        # URDF et maillages préparés en arrière-plan (rover_assets.start_loading), idéalement
+        # lancé dès le démarrage de l'application ; les pièces sont attachées dès qu'ils sont prêts
+        self.assets = assets or start_loading(urdf_path, config.ROVER_ASSET_CACHE_DIR, config.ROVER_ASSET_WORKERS)
+        self._built = False
 
     def build_from_urdf(self):
+        # Attache a la scene des pièces préparées en arrière-plan (voir rover_assets.prepare_rover) :
+        # seule cette étape, rapide, tourne sur le thread principal
+        self._built = True
         try:
-            # 1. Parser le fichier URDF
-            robot = URDF.from_xml_file(self.urdf_path)
-            urdf_dir = os.path.dirname(self.urdf_path)
+            assets = self.assets.result()
+            for message, level in assets['messages']:
+                self.logger.log(message, level)
+            self.root_link_name = assets['root_link']
 
-            # 2. Créer une entité Ursina pour chaque "link"
-            for link in robot.links:
-                # Vérifier si le link a une géométrie visuelle
-                if not (link.visual and link.visual.geometry and link.visual.geometry.filename):
-                    continue
-                
-                raw_mesh_path = link.visual.geometry.filename
-                
-                # --- CORRECTION ---
-                # On supprime le préfixe 'package://' si celui-ci est présent dans le chemin.
-                if raw_mesh_path.startswith('package://'):
-                    clean_mesh_path = raw_mesh_path.replace('package://', '', 1)
-                else:
-                    clean_mesh_path = raw_mesh_path
-                
-                # On construit le chemin final relatif au dossier du fichier URDF.
-                mesh_path = os.path.join(urdf_dir, clean_mesh_path).replace('\\', '/')
-                
-                if not os.path.exists(mesh_path):
-                    self.logger.log(f"Erreur: Fichier mesh introuvable: {mesh_path}", "error")
-                    continue
-                
-                # Création de l'entité pour ce link
+            # Une entité Ursina par "link" : lot fusionné des pièces uniques, instances des pièces
+            # répétées (une seule copie CPU/GPU par forme), une boîte par <collision>
+            for link in assets['links']:
                 link_entity = Entity(
-                    name=link.name,
-                    model=load_model(mesh_path, use_deepcopy=True),
+                    parent=self,
+                    name=link['name'],
+                    model=link['batch'],
                     shader=lit_with_shadows_shader,
-                    color=color.light_gray,
+                    color=color.white,  # Couleurs portées par les sommets
                     cast_shadows=True
                 )
-                self.links[link.name] = link_entity
-                self.logger.log(f"-> Link '{link.name}' créé.", "success")
-            
+                for model, matrix, rgba, name in link['instances']:
+                    part = Entity(parent=link_entity, name=name)
+                    part.setMat(Mat4(*matrix.T.ravel()))
+                    part.setColorScale(Vec4(*rgba))
+                    model.instance_to(part)
+                self.links[link['name']] = link_entity
+                for center, size in link['boxes']:
+                    self.collision_boxes.append((('link', link['name'], len(self.collision_boxes)), link_entity, center, size))
+                self.logger.log(f"-> Link '{link['name']}' créé ({link['merged']} pièces fusionnées, "
+                                f"{len(link['instances'])} instanciées).", "success")
+
+            self.logger.log(f"Maillages du rover : {assets['hits']} lus depuis le cache, {assets['misses']} convertis, "
+                            f"{assets['shapes']} géométries distinctes, préparés en {assets['seconds']:.2f} s "
+                            f"en arrière-plan.", "debug")
+
             # ... (Le reste de la fonction pour assembler les joints est inchangé) ...
             
         except Exception as e:
             self.logger.log(f"ERREUR CRITIQUE lors du parsing URDF: {e}", "error")
 
+    def part_box(self, link, center, size, offset=(0, 0, 0)):
+        # Boite englobante alignee d'une piece, invariante par rotation en lacet du rover
+        size = np.multiply(size, link.world_scale)
+        half_xz = np.hypot(size[0], size[2]) / 2
+        center = np.add(scene.getRelativePoint(link, Vec3(*center)), offset)
+        half = np.array([half_xz, size[1] / 2, half_xz])
+        return center, half
+
+    def sync_collision_index(self):
+        # A chaque image : met a jour les boites des pieces dans l'index spatial partage (rerangees seulement si elles changent de cellule)
+        if self.obstacles is None: return
+        for key, link, center, size in self.collision_boxes:
+            center, half = self.part_box(link, center, size)
+            self.obstacles.index.update(key, center - half, center + half)
+
+    def collides(self, offset):
+        # Phase large : seules les cellules autour de chaque piece sont visitees ; phase fine sur les spheres des rochers
+        if self.obstacles is None: return False
+        return any(self.obstacles.hits_box(*self.part_box(link, center, size, offset))
+                   for _, link, center, size in self.collision_boxes)
+
     def update(self):
         # La logique de physique doit être adaptée pour gérer les suspensions.
         # Pour l'instant, on applique une physique simplifiée au corps principal.
         
-        root_link_name = "base_link" # Nom standard pour le châssis, à adapter si besoin
-        if not self.links.get(root_link_name):
+        if not self._built:
+            if self.assets.done(): self.build_from_urdf()
+            return
+        if not self.links.get(self.root_link_name):
             return # Ne rien faire si le rover n'est pas encore construit
 
         # --- Physique simplifiée (similaire à avant) ---
-        ray = raycast(self.world_position + self.up*2, self.down, ignore=[self, *self.links.values()], distance=10)
+        # Hauteur et normale lues directement sur la grille du terrain (plus de raycast par image).
+        # Comme l'ancien rayon (origine 2 au-dessus, portee 10), le sol n'est "touche" que s'il est a moins de 8 sous le rover.
+        ground_y = self.terrain_field.height_at(self.x, self.z) if self.terrain_field else None
         
-        if ray.hit and ray.entity == self.ground:
-            target_y = ray.world_point.y + config.RIDE_HEIGHT
+        if ground_y is not None and ground_y >= self.y - 8:
+            target_y = ground_y + config.RIDE_HEIGHT
             self.y = lerp(self.y, target_y, time.dt * config.TERRAIN_FOLLOW_SMOOTHNESS)
             
             calculator = Entity(position=self.position, add_to_scene_entities=False)
-            calculator.look_at(self.world_position + self.forward, up=ray.world_normal)
+            calculator.look_at(self.world_position + self.forward, up=Vec3(*self.terrain_field.normal_at(self.x, self.z)))
             target_quat = calculator.quaternion
             destroy(calculator)
             
@@ -100,8 +127,10 @@ class Rover(Entity):
         
         if move_direction != 0:
             move_vec = self.forward * move_direction * config.ROVER_SPEED * time.dt
-            # On vérifie la collision du châssis
-            if not self.links[root_link_name].intersects(ignore=[self, *self.links.values()]).hit:
+            # On vérifie la collision des pièces du rover à la position visée (index spatial + sphères des rochers)
+            if not self.collides(move_vec):
                 self.position += move_vec
             else:
-                self.logger.log("Alerte: Collision!", "error")
\ No newline at end of file
+                self.logger.log("Alerte: Collision!", "error")
+
+        self.sync_collision_index()
\ No newline at end of file
@@ -0,0 +1,451 @@
+# rover_assets.py
+# Cache des maillages du rover : chaque fichier reference par l'URDF est converti une fois en
+# .bam pret a afficher (sommets soudes, normales lissees), range a cote de my-robot/assets sous
+# une cle (hash du contenu, version du convertisseur). Les lancements suivants relisent le .bam.
+# Les STL binaires sont lus directement avec numpy ; les autres formats passent par assimp.
+# Les pieces de meme forme (exportees de la CAO chacune a sa place, donc de contenus differents)
+# sont reconnues au chargement et partagent une seule geometrie, instanciee par piece.
+# Tout le chargement (URDF, maillages, lots fusionnes) se fait hors du thread principal
+# (voir start_loading) : il ne reste au rover qu'a attacher les noeuds prepares a la scene.
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import os
+import threading
+import time
+import numpy as np
+from urdf_parser_py.urdf import URDF
+from panda3d.core import Filename, Geom, GeomNode, GeomTriangles, GeomVertexFormat, Loader, LoaderOptions, NodePath, \
+    load_prc_file_data
+from terrain_mesh import geom_node, index_dtype
+
+# A incrementer des que la conversion change (les anciennes entrees sont alors ignorees).
+CONVERTER_VERSION = 3
+
+# Un triangle STL binaire : normale de facette, 3 sommets, mot d'attribut (50 octets)
+_STL_TRIANGLE = np.dtype([('normal', '<f4', (3,)), ('vertices', '<f4', (3, 3)), ('attribute', '<u2')])
+_STL_HEADER = 84
+
+# Orientations essayees pour reconnaitre une meme forme : identite et demi-tours autour de chaque
+# axe (piece gauche/droite d'un ensemble symetrique). Pas de miroir : il inverserait les faces.
+_SHAPE_ROTATIONS = (np.diag([1., 1., 1.]), np.diag([1., -1., -1.]), np.diag([-1., 1., -1.]), np.diag([-1., -1., 1.]))
+_SHAPE_TOLERANCE = 1e-5  # Ecart maximal entre sommets correspondants de deux pieces de meme forme (m)
+# Part de triangles differents toleree : la CAO peut trianguler autrement quelques faces planes
+_SHAPE_TRIANGLE_MISMATCH = 0.01
+
+# Sommets des lots de pieces fusionnees : disposition en octets de GeomVertexFormat.get_v3n3c4()
+COLORED_VERTEX = np.dtype([('vertex', '<f4', (3,)), ('normal', '<f4', (3,)), ('color', 'u1', (4,))])
+
+_CONVERTER_OPTIONS = """
+assimp-join-identical-vertices true
+assimp-gen-normals true
+assimp-smooth-normal-angle 60
+assimp-optimize-meshes true
+"""
+_options_loaded = False
+
+
+def file_hash(path):
+    """sha1 du contenu du fichier."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _load_sync(path):
+    # Chargement direct (sans le cache de modeles de Panda3D ni ShowBase)
+    node = Loader.get_global_ptr().load_sync(
+        Filename.from_os_specific(path), LoaderOptions(LoaderOptions.LF_no_cache | LoaderOptions.LF_report_errors))
+    return NodePath(node) if node else None
+
+
+def read_stl(path):
+    """Triangles (N, 3, 3) float32 d'un STL binaire, None si le fichier n'en est pas un (STL ASCII)."""
+    data = np.fromfile(path, dtype=np.uint8)
+    if len(data) < _STL_HEADER: return None
+    count = int(data[80:84].view('<u4')[0])
+    if len(data) != _STL_HEADER + count * _STL_TRIANGLE.itemsize: return None
+    return np.frombuffer(data, dtype=_STL_TRIANGLE, offset=_STL_HEADER)['vertices']
+
+
+def weld_mesh(triangles, crease_angle=60.0):
+    """Maillage indexe (vertex buffer (V, 6) float32 position+normale, indices) d'une soupe de triangles.
+
+    Les sommets de meme position sont soudes et recoivent la moyenne (ponderee par l'aire) des
+    normales des facettes voisines, sauf au-dela de `crease_angle` de cette moyenne : le coin
+    garde alors un sommet separe par orientation de facette, pour que les aretes vives restent nettes.
+    """
+    triangles = np.asarray(triangles, dtype=np.float32).reshape(-1, 3, 3)
+    corners = triangles.reshape(-1, 3) + np.float32(0)  # -0.0 -> 0.0 avant comparaison binaire
+    # Soudure par tri des positions vues comme des cles de 12 octets
+    keys = np.ascontiguousarray(corners).view(np.dtype((np.void, 12))).ravel()
+    _, position_ids = np.unique(keys, return_inverse=True)
+    position_ids = position_ids.ravel()
+
+    # Normales de facette ponderees par l'aire (produit vectoriel non normalise)
+    cross = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    length = np.linalg.norm(cross, axis=1, keepdims=True)
+    unit = np.divide(cross, length, out=np.zeros_like(cross), where=length > 0)
+    corner_cross = np.repeat(cross, 3, axis=0)
+    smooth = np.zeros((position_ids.max() + 1, 3), dtype=np.float64)
+    np.add.at(smooth, position_ids, corner_cross)
+    smooth /= np.maximum(np.linalg.norm(smooth, axis=1, keepdims=True), 1e-20)
+
+    # Coins d'arete vive : une cle par (position, orientation de facette arrondie)
+    corner_unit = np.repeat(unit, 3, axis=0)
+    sharp = (corner_unit * smooth[position_ids]).sum(axis=1) < np.cos(np.radians(crease_angle))
+    octant = np.rint(corner_unit * 8).astype(np.int64) + 8  # Composantes arrondies dans 0..16
+    group = np.where(sharp, 1 + octant @ np.array([17 * 17, 17, 1]), 0)
+    _, first, vertex_ids = np.unique(position_ids * (17 ** 3 + 1) + group, return_index=True, return_inverse=True)
+    vertex_ids = vertex_ids.ravel()
+
+    normals = np.zeros((len(first), 3), dtype=np.float64)
+    np.add.at(normals, vertex_ids, corner_cross)
+    normals /= np.maximum(np.linalg.norm(normals, axis=1, keepdims=True), 1e-20)
+    vertex_buffer = np.hstack((corners[first], normals)).astype(np.float32)
+    return vertex_buffer, vertex_ids.astype(index_dtype(len(first)))
+
+
+def centered_mesh(vertex_buffer):
+    """Maillage recentre sur le barycentre de ses positions distinctes : (vertex buffer, placement 4x4)."""
+    center = np.unique(vertex_buffer[:, :3], axis=0).astype(np.float64).mean(axis=0)
+    centered = vertex_buffer.copy()
+    centered[:, :3] -= center.astype(np.float32)
+    placement = np.eye(4)
+    placement[:3, 3] = center
+    return centered, placement
+
+
+def shape_signature(vertex_buffer, indices):
+    """(positions distinctes (P, 3) float64, triangles en indices de positions) d'un maillage soude."""
+    points, ids = np.unique(vertex_buffer[:, :3], axis=0, return_inverse=True)
+    return points.astype(np.float64), ids.ravel()[indices].reshape(-1, 3)
+
+
+def canonical_triangles(triangles):
+    """Triangles (T, 3) tries, chacun commencant par son plus petit indice (le sens de parcours est garde)."""
+    start = np.argmin(triangles, axis=1)
+    rolled = triangles[np.arange(len(triangles))[:, None], (start[:, None] + np.arange(3)) % 3]
+    return rolled[np.lexsort(rolled.T[::-1])]
+
+
+def same_triangles(triangles, reference, mismatch=_SHAPE_TRIANGLE_MISMATCH):
+    """Vrai si deux listes canoniques de triangles ne different que d'une part `mismatch` au plus."""
+    if len(triangles) != len(reference): return False
+    if np.array_equal(triangles, reference): return True
+    a = np.ascontiguousarray(triangles, dtype=np.int64).view(np.dtype((np.void, 24))).ravel()
+    b = np.ascontiguousarray(reference, dtype=np.int64).view(np.dtype((np.void, 24))).ravel()
+    return len(triangles) - np.isin(a, b).sum() <= mismatch * len(triangles)
+
+
+def match_points(points, reference, tolerance=_SHAPE_TOLERANCE):
+    """Indice dans `reference` du point a moins de `tolerance` de chaque point, None si pas de bijection."""
+    if len(points) != len(reference): return None
+    # Cellules de la taille de la tolerance : le correspondant est dans l'une des 27 cellules voisines
+    cells = np.floor(reference / tolerance).astype(np.int64)
+    keys = (cells[:, 0] * 2097152 + cells[:, 1]) * 2097152 + cells[:, 2]
+    order = np.argsort(keys)
+    sorted_keys = keys[order]
+    base = np.floor(points / tolerance).astype(np.int64)
+    mapping = np.full(len(points), -1)
+    for offset in np.stack(np.meshgrid(*[(-1, 0, 1)] * 3, indexing='ij'), axis=-1).reshape(-1, 3):
+        cell = base + offset
+        wanted = (cell[:, 0] * 2097152 + cell[:, 1]) * 2097152 + cell[:, 2]
+        at = np.minimum(np.searchsorted(sorted_keys, wanted), len(sorted_keys) - 1)
+        candidate = order[at]
+        close = (sorted_keys[at] == wanted) & (np.abs(reference[candidate] - points).max(axis=1) <= tolerance)
+        mapping = np.where((mapping < 0) & close, candidate, mapping)
+    if (mapping < 0).any() or len(np.unique(mapping)) != len(mapping): return None
+    return mapping
+
+
+def origin_matrix(xyz=None, rpy=None):
+    """Matrice 4x4 d'un <origin> URDF (rotation fixe roulis X, tangage Y, lacet Z, puis translation)."""
+    roll, pitch, yaw = rpy or (0, 0, 0)
+    cr, sr, cp, sp, cy, sy = np.cos(roll), np.sin(roll), np.cos(pitch), np.sin(pitch), np.cos(yaw), np.sin(yaw)
+    matrix = np.eye(4)
+    matrix[:3, :3] = [[cy * cp, cy * sp * sr - sy * cr, cy * sp * cr + sy * sr],
+                      [sy * cp, sy * sp * sr + cy * cr, sy * sp * cr - cy * sr],
+                      [-sp, cp * sr, cp * cr]]
+    matrix[:3, 3] = xyz or (0, 0, 0)
+    return matrix
+
+
+def mesh_arrays(model):
+    """(vertex buffer (V, 6) float32, indices) d'un modele a un seul Geom v3n3 indexe, sinon None."""
+    nodes = [model] if model.node().is_of_type(GeomNode) else list(model.find_all_matches('**/+GeomNode'))
+    if len(nodes) != 1 or nodes[0].node().get_num_geoms() != 1 or not nodes[0].get_transform().is_identity():
+        return None
+    geom = nodes[0].node().get_geom(0)
+    vdata = geom.get_vertex_data()
+    if vdata.get_format() != GeomVertexFormat.get_v3n3() or geom.get_num_primitives() != 1:
+        return None
+    primitive = geom.get_primitive(0)
+    if not (isinstance(primitive, GeomTriangles) and primitive.is_indexed()):
+        return None
+    dtype = np.uint16 if primitive.get_index_type() == Geom.NT_uint16 else np.uint32
+    vertex_buffer = np.frombuffer(memoryview(vdata.get_array(0)), dtype=np.float32).reshape(-1, 6)
+    return vertex_buffer, np.frombuffer(memoryview(primitive.get_vertices()), dtype=dtype)
+
+
+def merge_parts(parts):
+    """Fusionne des pieces (vertex_buffer, indices, matrice 4x4, rgba) en un lot colore par sommet.
+
+    Retourne (sommets COLORED_VERTEX, indices) dans le repere commun des matrices.
+    """
+    total = sum(len(vertex_buffer) for vertex_buffer, _, _, _ in parts)
+    merged = np.empty(total, dtype=COLORED_VERTEX)
+    merged_indices = []
+    start = 0
+    for vertex_buffer, indices, matrix, rgba in parts:
+        end = start + len(vertex_buffer)
+        rotation = matrix[:3, :3].astype(np.float32)
+        merged['vertex'][start:end] = vertex_buffer[:, :3] @ rotation.T + matrix[:3, 3].astype(np.float32)
+        merged['normal'][start:end] = vertex_buffer[:, 3:] @ rotation.T
+        merged['color'][start:end] = np.clip(np.rint(np.asarray(rgba) * 255), 0, 255)
+        merged_indices.append(indices.astype(np.uint32) + start)
+        start = end
+    indices = np.concatenate(merged_indices) if merged_indices else np.empty(0, dtype=np.uint32)
+    return merged, indices.astype(index_dtype(total))
+
+
+def part_bounds(vertex_buffer, matrix):
+    """Boite englobante (min, max) d'une piece dans le repere de son lien."""
+    points = vertex_buffer[:, :3] @ matrix[:3, :3].T + matrix[:3, 3]
+    return points.min(axis=0), points.max(axis=0)
+
+
+class MeshCache:
+    """Maillages convertis, un fichier .bam par contenu source distinct.
+
+    En memoire, une seule geometrie par forme : un maillage identique a une forme deja chargee a
+    une translation et un demi-tour pres (_SHAPE_ROTATIONS) rend le NodePath de cette forme, a
+    instancier avec son propre placement. Une meme instance sert a tous les rovers (shared_cache).
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0  # Chargements servis par une forme deja en memoire
+        self.digests = {}  # chemin -> (mtime, taille, hash du contenu)
+        self.files = {}  # hash du contenu -> (NodePath partage, placement)
+        self.shapes = []  # dict(model, points, triangles, low, high) par forme distincte
+        self._lock = threading.Lock()
+
+    def entry_path(self, digest):
+        return os.path.join(self.directory, f'{digest[:20]}-v{CONVERTER_VERSION}.bam')
+
+    def file_digest(self, mesh_path):
+        # Hash du contenu, recalcule seulement si le fichier a change depuis le dernier appel
+        stat = os.stat(mesh_path)
+        known = self.digests.get(mesh_path)
+        if known is None or known[:2] != (stat.st_mtime_ns, stat.st_size):
+            known = self.digests[mesh_path] = (stat.st_mtime_ns, stat.st_size, file_hash(mesh_path))
+        return known[2]
+
+    def load(self, mesh_path):
+        """(NodePath partage, placement 4x4) du maillage : memoire, cache disque, ou conversion.
+
+        Le NodePath est commun a toutes les pieces de meme forme : ne pas le modifier ni le
+        reparenter, mais l'instancier (`instance_to`) sous un noeud portant `placement`.
+        """
+        return self.register(*self.read(mesh_path))
+
+    def read(self, mesh_path):
+        """Lecture (ou conversion) d'un fichier, sans toucher aux formes connues : (hash, NodePath, placement, signature).
+
+        Peut tourner en parallele sur plusieurs threads ; NodePath vaut None si le fichier est deja en memoire.
+        """
+        digest = self.file_digest(mesh_path)
+        with self._lock:
+            if digest in self.files: return digest, None, None, None
+        entry = self.entry_path(digest)
+        model = _load_sync(entry) if os.path.exists(entry) else None
+        hit = model is not None
+        if not hit:
+            model = self.convert(mesh_path)
+            os.makedirs(self.directory, exist_ok=True)
+            tmp_path = entry[:-len('.bam')] + f'.{threading.get_ident()}.tmp.bam'  # Un fichier par thread
+            if model.write_bam_file(Filename.from_os_specific(tmp_path)):
+                os.replace(tmp_path, entry)
+        with self._lock:
+            if hit: self.hits += 1
+            else: self.misses += 1
+        placement = np.array(model.get_tag('placement').split(), dtype=np.float64).reshape(4, 4) \
+            if model.has_tag('placement') else np.eye(4)
+        arrays = mesh_arrays(model)
+        return digest, model, placement, shape_signature(*arrays) if arrays is not None else None
+
+    def register(self, digest, model, placement, signature):
+        """Rattache un fichier lu a sa forme (dans l'ordre des appels, sous verrou) : (NodePath partage, placement)."""
+        with self._lock:
+            loaded = self.files.get(digest)
+            if loaded is not None:
+                self.shared += 1
+                return loaded
+            model, rotation = self.find_shape(model, signature)
+            if rotation is not None:
+                self.shared += 1
+                placement = placement @ rotation
+            loaded = self.files[digest] = (model, placement)
+            return loaded
+
+    def find_shape(self, model, signature):
+        # (NodePath de la forme deja chargee identique, rotation 4x4 qui y mene) ; sinon la forme
+        # est enregistree et (model, None) est retourne
+        if signature is None: return model, None
+        points, triangles = signature
+        for shape in self.shapes:
+            if len(shape['points']) != len(points) or len(shape['triangles']) != len(triangles):
+                continue
+            for rotation in _SHAPE_ROTATIONS:
+                rotated = points @ rotation
+                # Rejet rapide sur la boite englobante avant l'appariement des sommets
+                if np.abs(rotated.min(axis=0) - shape['low']).max() > _SHAPE_TOLERANCE \
+                        or np.abs(rotated.max(axis=0) - shape['high']).max() > _SHAPE_TOLERANCE:
+                    continue
+                mapping = match_points(rotated, shape['points'])
+                if mapping is not None and same_triangles(canonical_triangles(mapping[triangles]), shape['triangles']):
+                    matrix = np.eye(4)
+                    matrix[:3, :3] = rotation  # Demi-tour : sa propre inverse
+                    return shape['model'], matrix
+        self.shapes.append(dict(model=model, points=points, triangles=canonical_triangles(triangles),
+                                low=points.min(axis=0), high=points.max(axis=0)))
+        return model, None
+
+    def convert(self, mesh_path):
+        if mesh_path.lower().endswith('.stl'):
+            triangles = read_stl(mesh_path)
+            if triangles is not None:
+                vertex_buffer, indices = weld_mesh(triangles)
+                vertex_buffer, placement = centered_mesh(vertex_buffer)
+                model = geom_node(vertex_buffer, indices, name=os.path.basename(mesh_path))
+                # Placement enregistre avec le .bam (les tags sont conserves)
+                model.set_tag('placement', ' '.join(repr(float(v)) for v in placement.ravel()))
+                return model
+        global _options_loaded
+        if not _options_loaded:
+            load_prc_file_data('rover-assets', _CONVERTER_OPTIONS)
+            _options_loaded = True
+        model = _load_sync(mesh_path)
+        if model is None:
+            raise IOError(f"Maillage illisible: {mesh_path}")
+        model.flatten_strong()
+        return model
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def shared_cache(directory):
+    """MeshCache unique par dossier, partage par tous les rovers du processus."""
+    key = os.path.abspath(directory)
+    with _caches_lock:
+        if key not in _caches: _caches[key] = MeshCache(directory)
+        return _caches[key]
+
+
+def mesh_file(urdf_dir, element, messages):
+    """Chemin du maillage d'un <visual> ou <collision>, None s'il n'y en a pas ou s'il est introuvable."""
+    if not (element.geometry and getattr(element.geometry, 'filename', None)):
+        return None
+    raw_mesh_path = element.geometry.filename
+
+    # On supprime le prefixe 'package://' si celui-ci est present dans le chemin,
+    # puis on construit le chemin final relatif au dossier du fichier URDF.
+    if raw_mesh_path.startswith('package://'):
+        raw_mesh_path = raw_mesh_path.replace('package://', '', 1)
+    mesh_path = os.path.join(urdf_dir, raw_mesh_path).replace('\\', '/')
+
+    if not os.path.exists(mesh_path):
+        messages.append((f"Erreur: Fichier mesh introuvable: {mesh_path}", "error"))
+        return None
+    return mesh_path
+
+
+def element_matrix(element):
+    """Matrice 4x4 du <origin> d'un <visual> ou <collision> (identite s'il n'y en a pas)."""
+    origin = element.origin
+    return origin_matrix(origin.xyz, origin.rpy) if origin else np.eye(4)
+
+
+def material_rgba(visual, materials, default):
+    """Couleur du <material> de la piece, ou du materiau global de meme nom ; `default` sinon."""
+    material = visual.material
+    if material is not None and material.color is None:
+        material = materials.get(material.name)
+    if material is None or material.color is None:
+        return tuple(default)
+    return tuple(material.color.rgba)
+
+
+def prepare_rover(urdf_path, cache_dir=None, workers=2, default_rgba=(0.75, 0.75, 0.75, 1)):
+    """Parse l'URDF et prepare toutes les pieces du rover (thread de travail, sans appel a Ursina).
+
+    Les fichiers de maillage sont lus ou convertis en parallele sur `workers` threads, puis
+    rattaches a leur forme dans l'ordre de l'URDF. Par link : les pieces uniques sont fusionnees
+    en un lot colore par sommet, les pieces repetees restent a instancier, et chaque <collision>
+    donne une boite (centre, taille) dans le repere du link. Les messages sont retournes, pas
+    journalises : le journal (Ursina) ne s'utilise que depuis le thread principal.
+    """
+    started = time.perf_counter()
+    robot = URDF.from_xml_file(urdf_path)
+    urdf_dir = os.path.dirname(urdf_path)
+    cache = shared_cache(cache_dir or os.path.join(urdf_dir, 'assets_cache'))
+    materials = {material.name: material for material in robot.materials}
+    messages = []
+
+    elements = [element for link in robot.links for element in link.visuals + link.collisions]
+    paths = {id(element): mesh_file(urdf_dir, element, messages) for element in elements}
+    unique = list(dict.fromkeys(path for path in paths.values() if path))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='rover-mesh') as pool:
+        reads = list(pool.map(cache.read, unique))
+    loaded = {path: cache.register(*read) for path, read in zip(unique, reads)}
+
+    # Pieces visuelles : (geometrie partagee, placement, couleur, nom) ; une forme utilisee
+    # plusieurs fois (roues, fusees...) est instanciee plutot que dupliquee dans un lot
+    visuals = {}
+    for link in robot.links:
+        visuals[link.name] = []
+        for visual in link.visuals:
+            path = paths[id(visual)]
+            if path is None: continue
+            model, placement = loaded[path]
+            visuals[link.name].append((model, element_matrix(visual) @ placement,
+                                       material_rgba(visual, materials, default_rgba), os.path.basename(path)))
+    uses = Counter(model for parts in visuals.values() for model, _, _, _ in parts)
+
+    links = []
+    for link in robot.links:
+        merged, instances = [], []
+        for model, matrix, rgba, name in visuals[link.name]:
+            arrays = mesh_arrays(model) if uses[model] == 1 else None
+            if arrays is None: instances.append((model, matrix, rgba, name))  # Repetee ou non fusionnable
+            else: merged.append(arrays + (matrix, rgba))
+        if not (merged or instances):
+            continue
+        boxes = []
+        for collision in link.collisions:
+            path = paths[id(collision)]
+            arrays = mesh_arrays(loaded[path][0]) if path else None
+            if arrays is None: continue
+            low, high = part_bounds(arrays[0], element_matrix(collision) @ loaded[path][1])
+            boxes.append(((low + high) / 2, high - low))
+        batch = geom_node(*merge_parts(merged), name=link.name, vertex_format=GeomVertexFormat.get_v3n3c4()) \
+            if merged else None
+        links.append(dict(name=link.name, batch=batch, instances=instances, boxes=boxes, merged=len(merged)))
+
+    return dict(root_link=robot.get_root(), links=links, messages=messages, shapes=len(uses),
+                hits=cache.hits, misses=cache.misses, seconds=time.perf_counter() - started)
+
+
+def start_loading(urdf_path, cache_dir=None, workers=2):
+    """Lance prepare_rover dans un thread de fond et retourne son Future (a passer au Rover)."""
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='rover-assets')
+    future = executor.submit(prepare_rover, urdf_path, cache_dir, workers)
+    executor.shutdown(wait=False)  # Le thread se termine de lui-meme une fois le rover prepare
+    return future
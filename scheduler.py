@@ -0,0 +1,74 @@
+# scheduler.py
+# Decoupage du travail progressif du thread principal selon un budget de temps par image.
+# La taille des lots s'adapte au cout mesure d'un element, au lieu d'un nombre fixe par image.
+from collections import deque
+import time
+import config
+
+
+class FrameBudgetScheduler:
+    """File de taches executees par lots, "jusqu'a N ms par image".
+
+    Chaque tache est une file d'elements et un `handler(batch)` qui les traite.
+    Le cout par element est estime (moyenne glissante) pour chaque tache, et le
+    lot suivant est dimensionne pour tenir dans ce qui reste du budget.
+    """
+
+    def __init__(self, name, budget_ms=None, logger=None, smoothing=0.3):
+        self.name = name
+        self.budget = (budget_ms if budget_ms is not None else config.FRAME_BUDGET_MS) / 1000
+        self.logger = logger
+        self.smoothing = smoothing
+        self.tasks = {}  # nom -> [file d'elements, handler, cout estime par element (s) ou None]
+        self.started_at = None
+        self.last_frame_at = None
+        self.frames = 0
+        self.items_done = 0
+        self.work_time = 0.0
+
+    def submit(self, task, items, handler):
+        """Ajoute des elements a la tache `task` (creee au premier appel)."""
+        if self.started_at is None:
+            self.started_at = time.perf_counter()
+        entry = self.tasks.setdefault(task, [deque(), handler, None])
+        entry[0].extend(items)
+
+    @property
+    def busy(self):
+        return any(entry[0] for entry in self.tasks.values())
+
+    def step(self):
+        """A appeler une fois par image. Retourne True s'il reste du travail."""
+        now = time.perf_counter()
+        self.last_frame_at = now
+        if not self.busy: return False
+        self.frames += 1
+        deadline = now + self.budget
+        for entry in self.tasks.values():
+            queue, handler, cost = entry
+            while queue:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0: return True
+                # Premier lot d'un seul element pour mesurer le cout, ensuite lots adaptes au budget restant
+                size = 1 if cost is None else max(1, min(len(queue), int(remaining / max(cost, 1e-7))))
+                batch = [queue.popleft() for _ in range(size)]
+                t0 = time.perf_counter()
+                handler(batch)
+                elapsed = time.perf_counter() - t0
+                per_item = elapsed / size
+                cost = per_item if cost is None else cost + self.smoothing * (per_item - cost)
+                entry[2] = cost
+                self.items_done += size
+                self.work_time += elapsed
+        return self.busy
+
+    def report(self, label=None):
+        """Journalise la duree totale et la cadence d'images obtenue pendant le travail."""
+        if self.started_at is None: return
+        total = (self.last_frame_at or time.perf_counter()) - self.started_at
+        fps = self.frames / total if total > 0 and self.frames else 0
+        message = (f"{label or self.name} : {self.items_done} elements en {total:.2f}s "
+                   f"({self.work_time * 1000:.0f} ms de travail sur {self.frames} images, "
+                   f"{fps:.0f} img/s, cible {config.TARGET_FPS} img/s, budget {self.budget * 1000:.1f} ms)")
+        if self.logger: self.logger.log(message, "debug")
+        return message
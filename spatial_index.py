@@ -0,0 +1,78 @@
+# spatial_index.py
+# Phase large des collisions : table de hachage spatiale sur une grille uniforme (plan x, z).
+# Chaque objet est range dans les cellules couvertes par sa boite englobante ; une requete ne
+# visite que les cellules de la boite demandee, quel que soit le nombre total d'objets.
+from collections import defaultdict
+import math
+import numpy as np
+
+
+class SpatialHash:
+    """Index de boites englobantes alignees (min, max en x, y, z), mis a jour objet par objet.
+
+    Les cles sont quelconques (hashables) : entiers pour les rochers, ('link', nom, k) pour les
+    boites de collision du rover, etc. `update` ne rerange un objet que s'il change de cellules.
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = defaultdict(set)  # (cx, cz) -> cles presentes dans la cellule
+        self.items = {}                # cle -> (plage de cellules, min, max)
+
+    def __contains__(self, key):
+        return key in self.items
+
+    def _cell_range(self, lo, hi):
+        s = self.cell_size
+        return math.floor(lo[0] / s), math.floor(lo[2] / s), math.floor(hi[0] / s), math.floor(hi[2] / s)
+
+    @staticmethod
+    def _cells(cell_range):
+        x0, z0, x1, z1 = cell_range
+        return ((cx, cz) for cz in range(z0, z1 + 1) for cx in range(x0, x1 + 1))
+
+    def insert(self, key, lo, hi):
+        if key in self.items: self.remove(key)
+        cell_range = self._cell_range(lo, hi)
+        for cell in self._cells(cell_range): self.cells[cell].add(key)
+        self.items[key] = (cell_range, tuple(lo), tuple(hi))
+
+    def insert_many(self, keys, lo, hi):
+        """Insertion groupee ; `lo` et `hi` sont des tableaux (N, 3)."""
+        lo, hi = np.asarray(lo, dtype=np.float64), np.asarray(hi, dtype=np.float64)
+        ranges = np.floor(np.stack((lo[:, 0], lo[:, 2], hi[:, 0], hi[:, 2]), axis=1) / self.cell_size).astype(np.int64)
+        for key, cell_range, l, h in zip(keys, ranges.tolist(), lo.tolist(), hi.tolist()):
+            if key in self.items: self.remove(key)
+            for cell in self._cells(cell_range): self.cells[cell].add(key)
+            self.items[key] = (tuple(cell_range), tuple(l), tuple(h))
+
+    def update(self, key, lo, hi):
+        """Deplace un objet ; ne touche aux cellules que si sa plage de cellules a change."""
+        entry = self.items.get(key)
+        cell_range = self._cell_range(lo, hi)
+        if entry is None or entry[0] != cell_range:
+            self.insert(key, lo, hi)
+        else:
+            self.items[key] = (cell_range, tuple(lo), tuple(hi))
+
+    def remove(self, key):
+        entry = self.items.pop(key, None)
+        if entry is None: return
+        for cell in self._cells(entry[0]):
+            bucket = self.cells.get(cell)
+            if bucket is None: continue
+            bucket.discard(key)
+            if not bucket: del self.cells[cell]
+
+    def query(self, lo, hi, exclude=None):
+        """Cles dont la boite englobante chevauche la boite (lo, hi)."""
+        found = set()
+        for cell in self._cells(self._cell_range(lo, hi)):
+            found.update(self.cells.get(cell, ()))
+        result = []
+        for key in found:
+            if exclude and exclude(key): continue
+            _, l, h = self.items[key]
+            if l[0] <= hi[0] and h[0] >= lo[0] and l[1] <= hi[1] and h[1] >= lo[1] and l[2] <= hi[2] and h[2] >= lo[2]:
+                result.append(key)
+        return result
@@ -0,0 +1,73 @@
+# terrain_bake.py
+# Format binaire compact d'un terrain termine (.rxtb) : charge tel quel au demarrage,
+# sans regeneration du bruit ni calcul des normales.
+#
+# Disposition (little-endian) :
+#   en-tete  : magic 'RXTB', version, rows, cols, origin_x, origin_z, spacing,
+#              vertex_count, index_count, taille d'un indice (2 ou 4 octets), graine du terrain
+#   blocs    : positions (vertex_count x 3 float32), normales (vertex_count x 3 float32),
+#              indices (index_count x uint16/uint32), chacun aligne sur 16 octets.
+import os
+import struct
+import numpy as np
+from terrain_field import TerrainField
+
+BAKE_MAGIC = b'RXTB'
+BAKE_VERSION = 2
+_HEADER = struct.Struct('<4sIIIdddIIIq')
+_ALIGN = 16
+
+
+def _aligned(offset):
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _layout(vertex_count, index_count, index_size):
+    positions = _aligned(_HEADER.size)
+    normals = _aligned(positions + vertex_count * 12)
+    indices = _aligned(normals + vertex_count * 12)
+    return positions, normals, indices, indices + index_count * index_size
+
+
+def save_bake(path, field, vertex_buffer, indices, seed):
+    """Ecrit un terrain (champ de hauteurs + buffers de rendu) dans `path`, de facon atomique.
+
+    `seed` : graine du terrain, relue au chargement pour placer les memes obstacles.
+    """
+    vertex_count, index_count = len(vertex_buffer), len(indices)
+    index_size = np.dtype(indices.dtype).itemsize
+    positions_at, normals_at, indices_at, end = _layout(vertex_count, index_count, index_size)
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    out = np.memmap(tmp_path, dtype=np.uint8, mode='w+', shape=(end,))
+    out[:_HEADER.size] = np.frombuffer(_HEADER.pack(
+        BAKE_MAGIC, BAKE_VERSION, field.rows, field.cols, field.origin_x, field.origin_z, field.spacing,
+        vertex_count, index_count, index_size, seed), dtype=np.uint8)
+    out[positions_at:positions_at + vertex_count * 12] = \
+        np.ascontiguousarray(vertex_buffer[:, :3], dtype=np.float32).view(np.uint8).ravel()
+    out[normals_at:normals_at + vertex_count * 12] = \
+        np.ascontiguousarray(vertex_buffer[:, 3:], dtype=np.float32).view(np.uint8).ravel()
+    out[indices_at:end] = np.ascontiguousarray(indices).view(np.uint8)
+    out.flush()
+    del out
+    os.replace(tmp_path, path)
+
+
+def load_bake(path):
+    """Relit un fichier .rxtb en memory-map. Retourne (field, positions, normals, indices, seed).
+
+    `field.heights` est une vue sur la colonne y des positions (aucune copie).
+    """
+    data = np.memmap(path, dtype=np.uint8, mode='r')
+    magic, version = struct.unpack_from('<4sI', data[:8].tobytes())
+    if magic != BAKE_MAGIC or version != BAKE_VERSION:
+        raise ValueError(f"{path}: fichier de terrain incompatible ({magic!r} v{version})")
+    _, _, rows, cols, origin_x, origin_z, spacing, vertex_count, index_count, index_size, seed = \
+        _HEADER.unpack(data[:_HEADER.size].tobytes())
+    positions_at, normals_at, indices_at, end = _layout(vertex_count, index_count, index_size)
+    positions = data[positions_at:positions_at + vertex_count * 12].view(np.float32).reshape(-1, 3)
+    normals = data[normals_at:normals_at + vertex_count * 12].view(np.float32).reshape(-1, 3)
+    indices = data[indices_at:end].view(np.uint16 if index_size == 2 else np.uint32)
+    field = TerrainField(positions[:, 1].reshape(rows, cols), origin_x, origin_z, spacing)
+    return field, positions, normals, indices, seed
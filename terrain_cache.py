@@ -0,0 +1,48 @@
+# terrain_cache.py
+# Cache disque des grilles de terrain, indexe par les parametres de generation.
+# Les tableaux sont stockes en .npy et relus en memory-map (sans copie).
+import hashlib
+import json
+import os
+import numpy as np
+from terrain_noise import NOISE_ENGINE_VERSION
+
+# A incrementer des que le contenu ou la disposition des tableaux stockes change.
+CACHE_FORMAT_VERSION = 2
+
+
+def cache_key(params):
+    """Cle stable (hexadecimale) d'un dictionnaire de parametres de generation."""
+    payload = json.dumps(dict(params, engine=NOISE_ENGINE_VERSION, format=CACHE_FORMAT_VERSION), sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:20]
+
+
+class TerrainCache:
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _entry(self, key):
+        return os.path.join(self.directory, key)
+
+    def load(self, params, names):
+        """Retourne {nom: tableau memory-map} si toutes les entrees existent, sinon None."""
+        entry = self._entry(cache_key(params))
+        paths = {name: os.path.join(entry, f'{name}.npy') for name in names}
+        if not all(os.path.exists(path) for path in paths.values()):
+            return None
+        try:
+            return {name: np.load(path, mmap_mode='r') for name, path in paths.items()}
+        except (OSError, ValueError):
+            return None  # Entree corrompue ou incomplete : on regenere
+
+    def store(self, params, **arrays):
+        """Ecrit les tableaux de facon atomique (fichier temporaire puis renommage)."""
+        entry = self._entry(cache_key(params))
+        os.makedirs(entry, exist_ok=True)
+        for name, array in arrays.items():
+            tmp_path = os.path.join(entry, f'{name}.tmp.npy')
+            np.save(tmp_path, np.ascontiguousarray(array))
+            os.replace(tmp_path, os.path.join(entry, f'{name}.npy'))
+        with open(os.path.join(entry, 'params.json'), 'w') as f:
+            json.dump(dict(params, engine=NOISE_ENGINE_VERSION, format=CACHE_FORMAT_VERSION), f, indent=2, sort_keys=True)
+        return entry
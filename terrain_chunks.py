@@ -0,0 +1,158 @@
+# terrain_chunks.py
+# Terrain "streaming" : tuiles generees a la demande autour du rover, avec LOD par anneaux.
+from ursina import Entity, color, destroy
+from ursina.shaders import lit_with_shadows_shader
+from concurrent.futures import ThreadPoolExecutor
+from terrain_field import TerrainField, TiledField
+from terrain_mesh import grid_triangles, grid_normals, grid_vertex_buffer, add_skirt, geom_node
+from scheduler import FrameBudgetScheduler
+import numpy as np
+import time
+import config
+
+
+def chunk_lod(distance):
+    """Niveau de detail d'une tuile situee a `distance` tuiles (Chebyshev) de la tuile centrale."""
+    for lod, ring in enumerate(config.CHUNK_LOD_RINGS):
+        if distance <= ring:
+            return lod
+    return len(config.CHUNK_LOD_RINGS) - 1
+
+
+def skirt_depth(noise, cx, cz):
+    """Profondeur de jupe d'une tuile : ecart maximal, le long de ses 4 bords, entre le bord au
+    LOD 0 et ce meme bord a chacun des LOD plus grossiers (interpolation lineaire), plus la marge
+    CHUNK_SKIRT_DEPTH. Les deux tuiles d'un bord commun trouvent le meme ecart pour ce bord.
+    """
+    fine = config.CHUNK_SEGMENTS
+    edge = np.arange(fine + 1, dtype=np.float64) * (config.CHUNK_SIZE / fine)
+    x0, z0 = cx * config.CHUNK_SIZE, cz * config.CHUNK_SIZE
+    edges = (
+        noise.grid(x0 + edge, [z0])[0], noise.grid(x0 + edge, [z0 + config.CHUNK_SIZE])[0],
+        noise.grid([x0], z0 + edge)[:, 0], noise.grid([x0 + config.CHUNK_SIZE], z0 + edge)[:, 0],
+    )
+    index = np.arange(fine + 1)
+    gap = 0.0
+    for lod in range(1, len(config.CHUNK_LOD_RINGS)):
+        step = fine // max(1, fine >> lod)
+        for heights in edges:
+            coarse = np.interp(index, index[::step], heights[::step])
+            gap = max(gap, float(np.abs(heights - coarse).max()))
+    return gap + config.CHUNK_SKIRT_DEPTH
+
+
+def build_chunk(noise, cx, cz, lod):
+    """Calcule les buffers d'une tuile (thread de travail, sans appel a Ursina).
+
+    Les hauteurs sont evaluees avec une marge d'un echantillon pour que les
+    normales du bord soient identiques a celles des tuiles voisines.
+    """
+    segments = max(1, config.CHUNK_SEGMENTS >> lod)
+    spacing = config.CHUNK_SIZE / segments
+    local = np.arange(-1, segments + 2, dtype=np.float64) * spacing
+    heights = noise.grid(cx * config.CHUNK_SIZE + local, cz * config.CHUNK_SIZE + local)
+    normals = grid_normals(heights, spacing)[1:-1, 1:-1]
+    vertex_buffer = grid_vertex_buffer(local[1:-1], local[1:-1], heights[1:-1, 1:-1], normals)
+    vertex_buffer, triangles = add_skirt(vertex_buffer, grid_triangles(segments), segments + 1, skirt_depth(noise, cx, cz))
+    field = TerrainField(heights[1:-1, 1:-1], cx * config.CHUNK_SIZE, cz * config.CHUNK_SIZE, spacing)
+    return vertex_buffer, triangles, field
+
+
+class ChunkedTerrain(Entity):
+    def __init__(self, ground_entity, noise, logger, progress_bar, on_complete, **kwargs):
+        super().__init__(**kwargs)
+        self.ground_entity = ground_entity; self.noise = noise; self.logger = logger
+        self.progress_bar = progress_bar; self.on_complete = on_complete
+        self.focus = None  # Entite suivie (le rover), l'origine tant qu'elle n'existe pas
+        self.chunks = {}   # (cx, cz) -> (lod, entite)
+        self.pending = {}  # (cx, cz) -> (lod, future)
+        self.field = TiledField(config.CHUNK_SIZE)
+        self._executor = ThreadPoolExecutor(
+            max_workers=config.CHUNK_WORKERS, thread_name_prefix='terrain-chunk')
+        # Les tuiles terminees sont attachees a la scene dans un budget de temps par image
+        self.scheduler = FrameBudgetScheduler("Terrain par tuiles", logger=self.logger)
+        self._started_at = time.perf_counter()
+        self._ready = False
+        self.logger.log("Demarrage du terrain par tuiles...", "debug")
+
+    def _center(self):
+        x, z = (self.focus.x, self.focus.z) if self.focus else (0, 0)
+        return int(np.floor(x / config.CHUNK_SIZE)), int(np.floor(z / config.CHUNK_SIZE))
+
+    def update(self):
+        center_x, center_z = self._center()
+        radius = config.CHUNK_VIEW_RADIUS
+
+        # 1. Demander les tuiles manquantes ou dont le LOD a change, les plus proches d'abord
+        wanted = []
+        for dz in range(-radius, radius + 1):
+            for dx in range(-radius, radius + 1):
+                distance = max(abs(dx), abs(dz))
+                key = (center_x + dx, center_z + dz)
+                lod = chunk_lod(distance)
+                current = self.chunks.get(key)
+                if (current and current[0] == lod) or (key in self.pending and self.pending[key][0] == lod):
+                    continue
+                wanted.append((distance, key, lod))
+        for _, key, lod in sorted(wanted):
+            if key in self.pending: self.pending[key][1].cancel()
+            self.pending[key] = (lod, self._executor.submit(build_chunk, self.noise, key[0], key[1], lod))
+
+        # 2. Attacher les tuiles terminees, dans le budget de temps de l'image (thread principal)
+        done = [(key, lod, future) for key, (lod, future) in self.pending.items() if future.done()]
+        for key, _, _ in done:
+            del self.pending[key]
+        self.scheduler.submit('attach', done, self._attach_batch)
+        self.scheduler.step()
+
+        # 3. Evincer les tuiles sorties du rayon de conservation
+        for key in list(self.chunks):
+            if max(abs(key[0] - center_x), abs(key[1] - center_z)) > config.CHUNK_EVICT_RADIUS:
+                destroy(self.chunks.pop(key)[1])
+                self.field.tiles.pop(key, None)
+        for key in [k for k in self.pending
+                    if max(abs(k[0] - center_x), abs(k[1] - center_z)) > config.CHUNK_EVICT_RADIUS]:
+            self.pending.pop(key)[1].cancel()
+
+        if not self._ready: self._report_startup(center_x, center_z)
+
+    def _attach_batch(self, batch):
+        center_x, center_z = self._center()
+        for key, lod, future in batch:
+            if future.cancelled() or max(abs(key[0] - center_x), abs(key[1] - center_z)) > config.CHUNK_VIEW_RADIUS:
+                continue
+            if future.exception():
+                self.logger.log(f"ERREUR lors de la generation de la tuile {key}: {future.exception()}", "error")
+                continue
+            self._attach(key, lod, *future.result())
+
+    def _attach(self, key, lod, vertex_buffer, triangles, field):
+        previous = self.chunks.pop(key, None)
+        chunk = Entity(
+            parent=self.ground_entity, name=f'chunk_{key[0]}_{key[1]}',
+            position=(key[0] * config.CHUNK_SIZE, 0, key[1] * config.CHUNK_SIZE),
+            model=geom_node(vertex_buffer, triangles, name=f'chunk_{key[0]}_{key[1]}'),
+            color=color.hex('5a6a7a'), shader=lit_with_shadows_shader)
+        chunk.receive_shadows = True
+        # Pas de collider : MeshCollider ne trouve pas le GeomNode racine d'un modele geom_node (collider
+        # vide) ; hauteurs et normales se lisent sur self.field (TiledField)
+        self.chunks[key] = (lod, chunk)
+        self.field.tiles[key] = field
+        if previous: destroy(previous[1])
+
+    def _report_startup(self, center_x, center_z):
+        # Le terrain est utilisable des que l'anneau LOD 0 autour du point de depart est charge
+        ring = config.CHUNK_LOD_RINGS[0]
+        required = [(center_x + dx, center_z + dz) for dz in range(-ring, ring + 1) for dx in range(-ring, ring + 1)]
+        loaded = sum(1 for key in required if key in self.chunks and self.chunks[key][0] == 0)
+        self.progress_bar.set_progress(loaded / len(required))
+        if loaded == len(required):
+            self._ready = True
+            self.scheduler.report("Tuiles de depart")
+            self.logger.log(f"Terrain par tuiles pret en {time.perf_counter() - self._started_at:.2f}s "
+                            f"({len(self.chunks)} tuiles chargees).", "success")
+            if self.on_complete: self.on_complete()
+            self.progress_bar.enabled = False
+
+    def on_destroy(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,121 @@
+# terrain_collision.py
+# Collider du terrain decoupe en tuiles spatiales, construites a la premiere requete qui les touche
+# et liberees quand plus aucune entite suivie (rover, capteur) n'est a proximite.
+from ursina import Entity, Vec3, raycast, destroy
+from ursina.collider import Collider
+from panda3d.core import CollisionPolygon
+import math
+import numpy as np
+import config
+
+
+class TiledTerrainCollider(Entity):
+    def __init__(self, field, tile_cells=None, keep_radius=None, **kwargs):
+        super().__init__(**kwargs)
+        self.field = field
+        self.tile_cells = tile_cells or config.COLLIDER_TILE_CELLS
+        self.keep_radius = keep_radius or config.COLLIDER_KEEP_RADIUS
+        self.tiles = {}     # (tx, tz) -> Entity portant le collider de la tuile
+        self.tile_extents = {}  # (tx, tz) -> tile_bounds de la tuile construite (Entity.bounds est a Ursina)
+        self.trackers = []  # Entites qui maintiennent les tuiles proches en memoire
+        self.tiles_x = math.ceil((field.cols - 1) / self.tile_cells)
+        self.tiles_z = math.ceil((field.rows - 1) / self.tile_cells)
+
+    def track(self, entity):
+        if entity not in self.trackers: self.trackers.append(entity)
+
+    def untrack(self, entity):
+        if entity in self.trackers: self.trackers.remove(entity)
+
+    # --- Geometrie des tuiles ---
+    def _index_range(self, key):
+        tx, tz = key
+        ix0, iz0 = tx * self.tile_cells, tz * self.tile_cells
+        return ix0, min(ix0 + self.tile_cells, self.field.cols - 1), iz0, min(iz0 + self.tile_cells, self.field.rows - 1)
+
+    def tile_bounds(self, key):
+        """(x0, z0, x1, z1, y_min, y_max) en coordonnees monde."""
+        ix0, ix1, iz0, iz1 = self._index_range(key)
+        f = self.field
+        patch = f.heights[iz0:iz1 + 1, ix0:ix1 + 1]
+        return (f.origin_x + ix0 * f.spacing, f.origin_z + iz0 * f.spacing,
+                f.origin_x + ix1 * f.spacing, f.origin_z + iz1 * f.spacing,
+                float(patch.min()), float(patch.max()))
+
+    def tile_keys(self, x0, z0, x1, z1):
+        """Tuiles qui recouvrent le rectangle monde [x0, x1] x [z0, z1]."""
+        f = self.field
+        size = self.tile_cells * f.spacing
+        tx0 = max(0, math.floor((min(x0, x1) - f.origin_x) / size))
+        tx1 = min(self.tiles_x - 1, math.floor((max(x0, x1) - f.origin_x) / size))
+        tz0 = max(0, math.floor((min(z0, z1) - f.origin_z) / size))
+        tz1 = min(self.tiles_z - 1, math.floor((max(z0, z1) - f.origin_z) / size))
+        return [(tx, tz) for tz in range(tz0, tz1 + 1) for tx in range(tx0, tx1 + 1)]
+
+    def _build_tile(self, key):
+        ix0, ix1, iz0, iz1 = self._index_range(key)
+        f = self.field
+        xs = f.origin_x + np.arange(ix0, ix1 + 1) * f.spacing
+        zs = f.origin_z + np.arange(iz0, iz1 + 1) * f.spacing
+        patch = np.asarray(f.heights[iz0:iz1 + 1, ix0:ix1 + 1], dtype=np.float64)
+        vertices = [[Vec3(x, patch[j, i], z) for i, x in enumerate(xs)] for j, z in enumerate(zs)]
+        polygons = []
+        # Meme triangulation que le maillage ; ordre inverse comme dans ursina.MeshCollider
+        for j in range(len(zs) - 1):
+            for i in range(len(xs) - 1):
+                v00, v10 = vertices[j][i], vertices[j][i + 1]
+                v01, v11 = vertices[j + 1][i], vertices[j + 1][i + 1]
+                polygons.append(CollisionPolygon(v01, v10, v00))
+                polygons.append(CollisionPolygon(v01, v11, v10))
+        tile = Entity(parent=self, name=f'terrain_collider_{key[0]}_{key[1]}')
+        tile.collider = Collider(tile, polygons)
+        self.tile_extents[key] = self.tile_bounds(key)
+        self.tiles[key] = tile
+        return tile
+
+    def ensure(self, x0, z0, x1, z1, y0=-math.inf, y1=math.inf):
+        """Construit les tuiles du rectangle dont l'intervalle de hauteur croise [y0, y1]."""
+        built = []
+        for key in self.tile_keys(x0, z0, x1, z1):
+            tile = self.tiles.get(key)
+            if tile is None:
+                bounds = self.tile_bounds(key)
+                if bounds[5] < y0 or bounds[4] > y1: continue
+                tile = self._build_tile(key)
+            built.append(tile)
+        return built
+
+    def invalidate(self, x0, z0, x1, z1):
+        """Detruit les tuiles qui touchent le rectangle (terrain modifie) ; reconstruites a la prochaine requete."""
+        margin = self.field.spacing / 2  # Les sommets du bord sont partages par deux tuiles
+        for key in self.tile_keys(x0 - margin, z0 - margin, x1 + margin, z1 + margin):
+            tile = self.tiles.pop(key, None)
+            if tile is not None:
+                del self.tile_extents[key]
+                destroy(tile)
+
+    # --- Requetes limitees a la geometrie proche ---
+    def raycast(self, origin, direction, distance=9999, ignore=None, debug=False):
+        origin = Vec3(origin)
+        direction = Vec3(direction).normalized()
+        end = origin + direction * distance
+        self.ensure(origin.x, origin.z, end.x, end.z, min(origin.y, end.y), max(origin.y, end.y))
+        return raycast(origin, direction, distance=distance, traverse_target=self, ignore=ignore, debug=debug)
+
+    def intersects(self, entity, radius, ignore=None):
+        """Test de collision d'une entite a collider primitif contre les tuiles dans `radius` autour d'elle."""
+        p = entity.world_position
+        self.ensure(p.x - radius, p.z - radius, p.x + radius, p.z + radius, p.y - radius, p.y + radius)
+        return entity.intersects(traverse_target=self, ignore=ignore)
+
+    def update(self):
+        # Liberer les tuiles dont le centre est loin de toutes les entites suivies
+        if not self.trackers: return
+        positions = [(e.world_x, e.world_z) for e in self.trackers]
+        for key in list(self.tiles):
+            x0, z0, x1, z1 = self.tile_extents[key][:4]
+            cx, cz = (x0 + x1) / 2, (z0 + z1) / 2
+            reach = self.keep_radius + max(x1 - x0, z1 - z0) / 2
+            if all((cx - x) ** 2 + (cz - z) ** 2 > reach * reach for x, z in positions):
+                del self.tile_extents[key]
+                destroy(self.tiles.pop(key))
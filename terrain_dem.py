@@ -0,0 +1,153 @@
+# terrain_dem.py
+# Modeles numeriques de terrain reels (MNT orbitaux) : import d'un raster brut ou .npy par
+# memory-map, stockage en tuiles int16 quantifiees (echelle + decalage), puis lecture des
+# seules tuiles necessaires autour du rover.
+#
+# Format .rxdem (little-endian) :
+#   en-tete : magic 'RXDM', version, rows, cols, tile, scale, offset, spacing
+#   donnees : tiles_z x tiles_x tuiles de tile x tile int16 (tuiles du bord completees),
+#             alignees sur 64 octets ; hauteur = valeur * scale + offset
+from collections import OrderedDict
+import math
+import os
+import struct
+import threading
+import numpy as np
+
+DEM_MAGIC = b'RXDM'
+DEM_VERSION = 1
+_HEADER = struct.Struct('<4sIIIIddd')
+_DATA_AT = 64
+_QUANT_MAX = 32767  # -32768 reserve
+
+
+def _read_source(path, shape=None, dtype=None):
+    # .npy : en-tete lu par numpy ; brut : forme et type a fournir. Jamais charge en entier.
+    if path.endswith('.npy'):
+        return np.load(path, mmap_mode='r')
+    if shape is None:
+        raise ValueError(f"{path}: la forme (rows, cols) est requise pour un raster brut")
+    return np.memmap(path, dtype=np.dtype(dtype or '<f4'), mode='r', shape=tuple(shape))
+
+
+def import_dem(source_path, out_path, spacing, shape=None, dtype=None, tile=256, nodata=None, band_rows=None):
+    """Convertit un raster d'elevation en fichier .rxdem tuile et quantifie, bande de tuiles par bande de tuiles.
+
+    Les valeurs `nodata` (et NaN) sont remplacees par l'altitude minimale. Retourne `out_path`.
+    """
+    source = _read_source(source_path, shape, dtype)
+    rows, cols = source.shape
+    band_rows = band_rows or tile
+
+    def band(z0, z1):
+        values = np.asarray(source[z0:z1], dtype=np.float64)
+        invalid = ~np.isfinite(values)
+        if nodata is not None: invalid |= values == nodata
+        return values, invalid
+
+    # 1re passe : bornes des altitudes valides
+    low, high = math.inf, -math.inf
+    for z0 in range(0, rows, band_rows):
+        values, invalid = band(z0, min(z0 + band_rows, rows))
+        if (~invalid).any():
+            low, high = min(low, values[~invalid].min()), max(high, values[~invalid].max())
+    if low > high:
+        raise ValueError(f"{source_path}: aucune altitude valide")
+    offset = (low + high) / 2
+    scale = max((high - low) / (2 * _QUANT_MAX), 1e-9)
+
+    # 2e passe : quantification et ecriture tuile par tuile
+    tiles_z, tiles_x = math.ceil(rows / tile), math.ceil(cols / tile)
+    os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
+    tmp_path = out_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(DEM_MAGIC, DEM_VERSION, rows, cols, tile, scale, offset, spacing).ljust(_DATA_AT, b'\0'))
+    out = np.memmap(tmp_path, dtype='<i2', mode='r+', offset=_DATA_AT, shape=(tiles_z, tiles_x, tile, tile))
+    for tz in range(tiles_z):
+        values, invalid = band(tz * tile, min((tz + 1) * tile, rows))
+        values[invalid] = low
+        padded = np.full((tile, tiles_x * tile), low)
+        padded[:len(values), :cols] = values
+        padded[:len(values), cols:] = values[:, -1:]   # Bords completes par repetition
+        padded[len(values):] = padded[len(values) - 1]
+        quantized = np.clip(np.rint((padded - offset) / scale), -_QUANT_MAX, _QUANT_MAX).astype('<i2')
+        out[tz] = quantized.reshape(tile, tiles_x, tile).transpose(1, 0, 2)
+    out.flush()
+    del out
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+class DemSource:
+    """Source de hauteurs d'un fichier .rxdem, meme interface que terrain_noise.FractalNoise.
+
+    Le MNT est centre sur l'origine du monde. `grid` ne decode que les tuiles couvertes par la
+    grille demandee (cache LRU de `cache_tiles` tuiles decodees, partage entre threads) ; hors
+    du MNT, les hauteurs du bord sont prolongees. `relative` : l'altitude au centre devient 0.
+    """
+
+    parallel = False  # Lecture de tuiles : pas de pool de processus
+
+    def __init__(self, path, cache_tiles=64, relative=True):
+        self.path = path
+        with open(path, 'rb') as f:
+            magic, version, rows, cols, tile, scale, offset, spacing = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != DEM_MAGIC or version != DEM_VERSION:
+            raise ValueError(f"{path}: fichier MNT incompatible ({magic!r} v{version})")
+        self.rows, self.cols, self.tile = rows, cols, tile
+        self.scale, self.offset, self.spacing = scale, offset, spacing
+        self.tiles = np.memmap(path, dtype='<i2', mode='r', offset=_DATA_AT,
+                               shape=(math.ceil(rows / tile), math.ceil(cols / tile), tile, tile))
+        self.origin_x = -(cols - 1) * spacing / 2
+        self.origin_z = -(rows - 1) * spacing / 2
+        self.seed = 0
+        self.size = max(rows, cols) * spacing
+        self.cache_tiles = cache_tiles
+        self._decoded = OrderedDict()  # (tz, tx) -> tuile float32
+        self._lock = threading.Lock()
+        self.tiles_loaded = 0
+        self.base_height = 0.0
+        if relative: self.base_height = float(self.grid([0.0], [0.0])[0, 0])
+
+    def params(self):
+        return dict(dem=os.path.abspath(self.path), dem_version=DEM_VERSION, base_height=self.base_height)
+
+    def tile_heights(self, tz, tx):
+        """Tuile decodee (tile x tile float32), lue sur disque a la premiere demande."""
+        key = (tz, tx)
+        with self._lock:
+            tile = self._decoded.get(key)
+            if tile is not None:
+                self._decoded.move_to_end(key)
+                return tile
+        tile = self.tiles[tz, tx].astype(np.float32) * np.float32(self.scale) + np.float32(self.offset)
+        with self._lock:
+            self._decoded[key] = tile
+            self.tiles_loaded += 1
+            while len(self._decoded) > self.cache_tiles: self._decoded.popitem(last=False)
+        return tile
+
+    def _indices(self, coords, origin, count):
+        u = np.clip((np.asarray(coords, dtype=np.float64) - origin) / self.spacing, 0, count - 1)
+        i0 = np.minimum(np.floor(u).astype(np.int64), max(count - 2, 0))
+        return i0, np.minimum(i0 + 1, count - 1), (u - i0).astype(np.float32)
+
+    def grid(self, xs, zs):
+        """Hauteurs (float32) sur la grille produit (zs x xs), interpolees en bilineaire."""
+        x0, x1, wx = self._indices(xs, self.origin_x, self.cols)
+        z0, z1, wz = self._indices(zs, self.origin_z, self.rows)
+        # Bloc dense couvrant la grille, assemble a partir des seules tuiles qu'il touche
+        c0, c1, r0, r1 = int(x0.min()), int(x1.max()) + 1, int(z0.min()), int(z1.max()) + 1
+        t = self.tile
+        block = np.empty((r1 - r0, c1 - c0), dtype=np.float32)
+        for tz in range(r0 // t, (r1 - 1) // t + 1):
+            for tx in range(c0 // t, (c1 - 1) // t + 1):
+                tile = self.tile_heights(tz, tx)
+                a0, a1 = max(r0, tz * t), min(r1, (tz + 1) * t)
+                b0, b1 = max(c0, tx * t), min(c1, (tx + 1) * t)
+                block[a0 - r0:a1 - r0, b0 - c0:b1 - c0] = tile[a0 - tz * t:a1 - tz * t, b0 - tx * t:b1 - tx * t]
+        x0, x1, z0, z1 = x0 - c0, x1 - c0, z0 - r0, z1 - r0
+        wx, wz = wx[None, :], wz[:, None]
+        top = block[z0[:, None], x0[None, :]] * (1 - wx) + block[z0[:, None], x1[None, :]] * wx
+        bottom = block[z1[:, None], x0[None, :]] * (1 - wx) + block[z1[:, None], x1[None, :]] * wx
+        return top * (1 - wz) + bottom * wz - np.float32(self.base_height)
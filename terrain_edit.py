@@ -0,0 +1,104 @@
+# terrain_edit.py
+# Deformation du terrain en cours de simulation (ornieres, creusement) sans reconstruire le maillage :
+# seules les hauteurs de la zone modifiee, les normales voisines et la plage correspondante du
+# vertex buffer sont recalculees, et seules les tuiles de collision qui la recouvrent sont invalidees.
+from ursina import Entity
+import math
+import numpy as np
+from terrain_mesh import refresh_vertex_buffer, upload_rows
+
+
+class TerrainEditor(Entity):
+    """Editions rectangulaires d'un terrain unique (TerrainGenerator).
+
+    Les hauteurs sont modifiees immediatement (la physique voit la nouvelle surface), les
+    normales et l'envoi au GPU sont regroupes et faits une fois par image dans `update`.
+    `listeners` sont appeles avec le rectangle monde (x0, z0, x1, z1) de chaque mise a jour.
+    """
+
+    def __init__(self, field, vertex_buffer, terrain_mesh, collider=None, **kwargs):
+        super().__init__(**kwargs)
+        self.field = field
+        self.vertex_buffer = vertex_buffer.reshape(field.rows, field.cols, 6)
+        self.terrain_mesh = terrain_mesh
+        self.terrain_collider = collider  # Pas `collider` : le setter d'Entity ignore ce qui n'est pas un Collider Ursina
+        self.listeners = []
+        self.dirty = []  # Rectangles d'indices (j0, j1, i0, i1) en attente de normales/envoi GPU
+        self.edits = 0
+        if not self.field.heights.flags.writeable:
+            # Hauteurs du cache ou d'un bake : memory-map en lecture seule, copie a la premiere instance
+            self.field.heights = np.array(self.field.heights)
+
+    # --- Edition ---
+    def region(self, x0, z0, x1, z1):
+        """Plage d'indices (j0, j1, i0, i1) des sommets dans le rectangle monde, None si vide."""
+        f = self.field
+        i0 = max(0, math.ceil((min(x0, x1) - f.origin_x) / f.spacing))
+        i1 = min(f.cols, math.floor((max(x0, x1) - f.origin_x) / f.spacing) + 1)
+        j0 = max(0, math.ceil((min(z0, z1) - f.origin_z) / f.spacing))
+        j1 = min(f.rows, math.floor((max(z0, z1) - f.origin_z) / f.spacing) + 1)
+        return (j0, j1, i0, i1) if i0 < i1 and j0 < j1 else None
+
+    def modify(self, x0, z0, x1, z1, function):
+        """Remplace les hauteurs du rectangle par `function(heights, xs, zs)` (bloc [z, x])."""
+        window = self.region(x0, z0, x1, z1)
+        if window is None: return None
+        j0, j1, i0, i1 = window
+        f = self.field
+        xs = f.origin_x + np.arange(i0, i1) * f.spacing
+        zs = f.origin_z + np.arange(j0, j1) * f.spacing
+        block = f.heights[j0:j1, i0:i1]
+        block[...] = function(block.copy(), xs, zs)
+        self.dirty.append(window)
+        self.edits += 1
+        return window
+
+    def add(self, x0, z0, x1, z1, delta):
+        return self.modify(x0, z0, x1, z1, lambda h, xs, zs: h + np.float32(delta))
+
+    def dig(self, x, z, radius, depth):
+        """Creuse un bol lisse de profondeur `depth` au centre (depth < 0 : monticule)."""
+        def bowl(h, xs, zs):
+            r2 = ((xs[None, :] - x) ** 2 + (zs[:, None] - z) ** 2) / (radius * radius)
+            return h - np.float32(depth) * np.clip(1 - r2, 0, None) ** 2
+        return self.modify(x - radius, z - radius, x + radius, z + radius, bowl)
+
+    def press(self, x, z, radius, height):
+        """Enfonce le sol sous un disque jusqu'a `height` (orniere d'une roue) ; sans effet s'il est deja plus bas."""
+        def footprint(h, xs, zs):
+            r = np.sqrt((xs[None, :] - x) ** 2 + (zs[:, None] - z) ** 2) / radius
+            # Fond plat sous la roue, raccord adouci vers le bord du disque
+            floor = height + np.where(r < 1, 0, np.inf) + np.clip(r - 0.6, 0, None) * (radius * 0.5)
+            return np.minimum(h, floor).astype(np.float32)
+        return self.modify(x - radius, z - radius, x + radius, z + radius, footprint)
+
+    # --- Propagation (une fois par image) ---
+    def update(self):
+        if self.dirty: self.flush()
+
+    def flush(self):
+        """Normales, vertex buffer, GPU et tuiles de collision des zones modifiees."""
+        f = self.field
+        for window in self._merged(self.dirty):
+            nj0, nj1, ni0, ni1 = refresh_vertex_buffer(self.vertex_buffer, f.heights, f.spacing, window)
+            upload_rows(self.terrain_mesh, self.vertex_buffer, (nj0, nj1, ni0, ni1))
+
+            x0, z0 = f.origin_x + ni0 * f.spacing, f.origin_z + nj0 * f.spacing
+            x1, z1 = f.origin_x + (ni1 - 1) * f.spacing, f.origin_z + (nj1 - 1) * f.spacing
+            if self.terrain_collider: self.terrain_collider.invalidate(x0, z0, x1, z1)
+            for listener in self.listeners: listener(x0, z0, x1, z1)
+        self.dirty.clear()
+
+    @staticmethod
+    def _merged(windows):
+        # Fusionne les rectangles qui se chevauchent (plusieurs editions au meme endroit dans une image)
+        merged = []
+        for window in windows:
+            j0, j1, i0, i1 = window
+            for k, (a0, a1, b0, b1) in enumerate(merged):
+                if j0 <= a1 and a0 <= j1 and i0 <= b1 and b0 <= i1:
+                    merged[k] = (min(j0, a0), max(j1, a1), min(i0, b0), max(i1, b1))
+                    break
+            else:
+                merged.append(window)
+        return merged
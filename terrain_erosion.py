@@ -0,0 +1,100 @@
+# terrain_erosion.py
+# Erosion thermique (eboulis au-dela de l'angle de talus) et hydraulique (ruissellement,
+# transport et depot de sediments) en passes numpy sur toute la grille, sans boucle par cellule.
+# Optionnelle, entre le calcul des hauteurs et celui des normales (voir TerrainGenerator._build).
+import time
+import numpy as np
+
+# A incrementer des que le resultat numerique de l'erosion change (sert de cle de cache).
+EROSION_VERSION = 1
+
+# Voisins 4-connexes : (tranche du centre, tranche du voisin) le long de chaque axe
+_NEIGHBOURS = (
+    ((slice(1, None), slice(None)), (slice(None, -1), slice(None))),   # z - 1
+    ((slice(None, -1), slice(None)), (slice(1, None), slice(None))),   # z + 1
+    ((slice(None), slice(1, None)), (slice(None), slice(None, -1))),   # x - 1
+    ((slice(None), slice(None, -1)), (slice(None), slice(1, None))),   # x + 1
+)
+
+
+def _drops(surface):
+    # Denivele positif vers chacun des 4 voisins (0 au bord de la grille)
+    drops = np.zeros((4,) + surface.shape, dtype=np.float32)
+    for k, (center, neighbour) in enumerate(_NEIGHBOURS):
+        drops[k][center] = np.maximum(surface[center] - surface[neighbour], 0)
+    return drops
+
+
+def _scatter(amounts, shape):
+    # Somme de ce que chaque cellule recoit de ses voisins (amounts[k] part vers le voisin k)
+    received = np.zeros(shape, dtype=np.float32)
+    for k, (center, neighbour) in enumerate(_NEIGHBOURS):
+        received[neighbour] += amounts[k][center]
+    return received
+
+
+def thermal_step(heights, talus, rate=0.5):
+    """Eboulement de la matiere au-dela du denivele `talus` entre voisins (en place)."""
+    excess = np.maximum(_drops(heights) - talus, 0)
+    total = excess.sum(axis=0)
+    # Moitie de l'exces le plus fort deplacee, repartie selon les exces vers chaque voisin
+    moved = rate * 0.5 * excess.max(axis=0)
+    share = np.divide(excess, total, out=np.zeros_like(excess), where=total > 0) * moved
+    heights -= share.sum(axis=0)
+    heights += _scatter(share, heights.shape)
+    return heights
+
+
+def hydraulic_step(heights, water, sediment, spacing, rain, capacity, solubility, deposition, evaporation):
+    """Une passe de ruissellement : pluie, ecoulement vers l'aval, erosion/depot, evaporation (en place)."""
+    water += rain
+    drops = _drops(heights + water)
+    total = drops.sum(axis=0)
+    # L'eau s'ecoule au plus jusqu'a egaliser la surface, et pas plus que ce que la cellule contient
+    outflow = np.minimum(water, 0.5 * total)
+    fractions = np.divide(drops, total, out=np.zeros_like(drops), where=total > 0)
+
+    # Capacite de transport : debit x sinus de la pente (minimum pour que l'eau stagnante depose)
+    steepest = drops.max(axis=0)
+    tilt = steepest / spacing
+    carry = capacity * outflow * np.maximum(tilt / np.sqrt(1 + tilt * tilt), 0.01)
+    # Pas plus d'une fraction du denivele le plus fort, pour ne pas creuser de puits
+    erode = np.minimum(solubility * np.maximum(carry - sediment, 0), 0.1 * steepest)
+    deposit = deposition * np.maximum(sediment - carry, 0)
+    heights -= erode - deposit
+    sediment += erode - deposit
+
+    # Transport de l'eau et des sediments en proportion de l'eau sortante
+    leaving = np.divide(outflow, water, out=np.zeros_like(water), where=water > 0)
+    moved_sediment = sediment * leaving
+    water += _scatter(fractions * outflow, water.shape) - outflow
+    sediment += _scatter(fractions * moved_sediment, sediment.shape) - moved_sediment
+    water *= 1 - evaporation
+
+
+def erode(heights, spacing, iterations=200, thermal_iterations=50, talus_angle=33.0, rain=0.01,
+          capacity=1.0, solubility=0.3, deposition=0.3, evaporation=0.05, time_budget=None, progress=None):
+    """Erosion hydraulique puis thermique d'une grille [z, x]. Retourne (hauteurs float32, passes faites).
+
+    `time_budget` (s) interrompt le calcul s'il est depasse : le nombre de passes effectivement
+    faites est retourne pour que l'appelant sache si le resultat est complet.
+    """
+    heights = np.array(heights, dtype=np.float32)
+    water = np.zeros_like(heights)
+    sediment = np.zeros_like(heights)
+    talus = np.float32(np.tan(np.radians(talus_angle)) * spacing)
+    deadline = time.perf_counter() + time_budget if time_budget else None
+    total = iterations + thermal_iterations
+    done = 0
+    for _ in range(iterations):
+        if deadline and time.perf_counter() > deadline: break
+        hydraulic_step(heights, water, sediment, spacing, rain, capacity, solubility, deposition, evaporation)
+        done += 1
+        if progress and done % 10 == 0: progress(done / total)
+    heights += sediment  # Les sediments encore en suspension se deposent sur place
+    for _ in range(thermal_iterations):
+        if deadline and time.perf_counter() > deadline: break
+        thermal_step(heights, talus)
+        done += 1
+        if progress and done % 10 == 0: progress(done / total)
+    return heights, done
@@ -0,0 +1,157 @@
+# terrain_field.py
+# Requetes O(1) de hauteur / normale / pente sur la grille du terrain, sans raycast.
+# L'interpolation suit exactement la triangulation du maillage (voir terrain_mesh.grid_triangles) :
+# chaque cellule est coupee par la diagonale (x + 1, z) -> (x, z + 1).
+import math
+import numpy as np
+
+
+class TerrainField:
+    """Vue interrogeable d'une grille de hauteurs [z, x] reguliere.
+
+    `origin_x`, `origin_z` : coordonnees monde du vertex [0, 0] ; `spacing` : pas de la grille.
+    Les requetes scalaires retournent None hors du terrain, les requetes groupees NaN.
+    """
+
+    def __init__(self, heights, origin_x, origin_z, spacing):
+        self.heights = heights
+        self.origin_x = origin_x
+        self.origin_z = origin_z
+        self.spacing = spacing
+        self.rows, self.cols = heights.shape
+
+    @classmethod
+    def centered(cls, heights, size):
+        """Champ d'une grille de cote `size` centree sur l'origine (disposition de TerrainGenerator)."""
+        segments = heights.shape[1] - 1
+        return cls(heights, -size / 2, -size / 2, size / segments)
+
+    # --- Requetes scalaires (boucle de physique) ---
+    def _cell(self, x, z):
+        gx = (x - self.origin_x) / self.spacing
+        gz = (z - self.origin_z) / self.spacing
+        if not (0 <= gx <= self.cols - 1 and 0 <= gz <= self.rows - 1):
+            return None
+        ix = min(int(gx), self.cols - 2)
+        iz = min(int(gz), self.rows - 2)
+        h = self.heights
+        return (gx - ix, gz - iz,
+                float(h[iz, ix]), float(h[iz, ix + 1]), float(h[iz + 1, ix]), float(h[iz + 1, ix + 1]))
+
+    def height_at(self, x, z):
+        cell = self._cell(x, z)
+        if cell is None: return None
+        fx, fz, h00, h10, h01, h11 = cell
+        if fx + fz <= 1:
+            return h00 + fx * (h10 - h00) + fz * (h01 - h00)
+        return h11 + (1 - fx) * (h01 - h11) + (1 - fz) * (h10 - h11)
+
+    def gradient_at(self, x, z):
+        """(dh/dx, dh/dz) du triangle sous le point."""
+        cell = self._cell(x, z)
+        if cell is None: return None
+        fx, fz, h00, h10, h01, h11 = cell
+        if fx + fz <= 1:
+            return (h10 - h00) / self.spacing, (h01 - h00) / self.spacing
+        return (h11 - h01) / self.spacing, (h11 - h10) / self.spacing
+
+    def normal_at(self, x, z):
+        gradient = self.gradient_at(x, z)
+        if gradient is None: return None
+        dx, dz = gradient
+        inv_length = 1 / math.sqrt(dx * dx + dz * dz + 1)
+        return -dx * inv_length, inv_length, -dz * inv_length
+
+    def slope_at(self, x, z):
+        """Pente en degres."""
+        gradient = self.gradient_at(x, z)
+        if gradient is None: return None
+        return math.degrees(math.atan(math.hypot(*gradient)))
+
+    # --- Requetes groupees : points de forme (N, 2) en (x, z) ---
+    def _cells(self, points):
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        gx = (points[:, 0] - self.origin_x) / self.spacing
+        gz = (points[:, 1] - self.origin_z) / self.spacing
+        inside = (gx >= 0) & (gx <= self.cols - 1) & (gz >= 0) & (gz <= self.rows - 1)
+        ix = np.clip(np.floor(gx), 0, self.cols - 2).astype(np.intp)
+        iz = np.clip(np.floor(gz), 0, self.rows - 2).astype(np.intp)
+        fx, fz = gx - ix, gz - iz
+        h = self.heights
+        return inside, fx, fz, h[iz, ix], h[iz, ix + 1], h[iz + 1, ix], h[iz + 1, ix + 1]
+
+    def sample(self, points):
+        """Hauteurs (float64, shape (N,)) aux points (x, z)."""
+        inside, fx, fz, h00, h10, h01, h11 = self._cells(points)
+        lower = fx + fz <= 1
+        heights = np.where(
+            lower,
+            h00 + fx * (h10 - h00) + fz * (h01 - h00),
+            h11 + (1 - fx) * (h01 - h11) + (1 - fz) * (h10 - h11))
+        return np.where(inside, heights, np.nan)
+
+    def sample_gradients(self, points):
+        inside, fx, fz, h00, h10, h01, h11 = self._cells(points)
+        lower = fx + fz <= 1
+        dx = np.where(lower, h10 - h00, h11 - h01) / self.spacing
+        dz = np.where(lower, h01 - h00, h11 - h10) / self.spacing
+        dx[~inside] = np.nan; dz[~inside] = np.nan
+        return dx, dz
+
+    def sample_normals(self, points):
+        """Normales unitaires (shape (N, 3))."""
+        dx, dz = self.sample_gradients(points)
+        inv_length = 1 / np.sqrt(dx * dx + dz * dz + 1)
+        return np.stack((-dx * inv_length, inv_length, -dz * inv_length), axis=-1)
+
+    def sample_slopes(self, points):
+        """Pentes en degres (shape (N,))."""
+        dx, dz = self.sample_gradients(points)
+        return np.degrees(np.arctan(np.hypot(dx, dz)))
+
+
+class TiledField:
+    """Meme interface que TerrainField, repartie sur les tuiles chargees du terrain par tuiles."""
+
+    def __init__(self, tile_size):
+        self.tile_size = tile_size
+        self.tiles = {}  # (cx, cz) -> TerrainField
+
+    def _tile(self, x, z):
+        return self.tiles.get((math.floor(x / self.tile_size), math.floor(z / self.tile_size)))
+
+    def height_at(self, x, z):
+        tile = self._tile(x, z)
+        return tile.height_at(x, z) if tile else None
+
+    def gradient_at(self, x, z):
+        tile = self._tile(x, z)
+        return tile.gradient_at(x, z) if tile else None
+
+    def normal_at(self, x, z):
+        tile = self._tile(x, z)
+        return tile.normal_at(x, z) if tile else None
+
+    def slope_at(self, x, z):
+        tile = self._tile(x, z)
+        return tile.slope_at(x, z) if tile else None
+
+    def _dispatch(self, points, query, width):
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        result = np.full((len(points), width), np.nan)
+        keys = np.floor(points / self.tile_size).astype(np.int64)
+        for key in {tuple(k) for k in keys.tolist()}:
+            tile = self.tiles.get(key)
+            if tile is None: continue
+            mask = (keys[:, 0] == key[0]) & (keys[:, 1] == key[1])
+            result[mask] = np.reshape(getattr(tile, query)(points[mask]), (-1, width))
+        return result
+
+    def sample(self, points):
+        return self._dispatch(points, 'sample', 1)[:, 0]
+
+    def sample_normals(self, points):
+        return self._dispatch(points, 'sample_normals', 3)
+
+    def sample_slopes(self, points):
+        return self._dispatch(points, 'sample_slopes', 1)[:, 0]
@@ -0,0 +1,133 @@
+# terrain_mesh.py
+# Construction vectorisee des buffers de maillage d'une grille de hauteurs.
+# Les fonctions numpy peuvent tourner dans un thread de travail ; `geom_node` (et `upload_rows`)
+# manipulent des objets Panda3D : depuis le thread principal, ou depuis un thread de travail tant
+# que le noeud n'est pas encore attache a la scene (voir rover_assets.prepare_rover).
+from panda3d.core import Geom, GeomNode, GeomTriangles, GeomVertexData, GeomVertexFormat, NodePath
+import numpy as np
+
+
+def index_dtype(vertex_count):
+    """uint16 tant que tous les indices tiennent sur 16 bits, sinon uint32."""
+    return np.uint16 if vertex_count <= 0xFFFF else np.uint32
+
+
+def grid_triangles(segments, dtype=None):
+    """Indices (plats) des 2 triangles de chaque cellule d'une grille segments x segments."""
+    width = segments + 1
+    dtype = dtype or index_dtype(width * width)
+    cells = np.arange(segments, dtype=np.uint32)
+    i = (cells[:, None] * width + cells[None, :]).ravel()
+    return np.stack((i, i + 1, i + width, i + 1, i + width + 1, i + width), axis=-1).ravel().astype(dtype)
+
+
+def grid_normals(heights, spacing):
+    """Normales unitaires (float32, shape (..., 3)) d'une grille [z, x] par differences centrees."""
+    dh_dz, dh_dx = np.gradient(np.asarray(heights, dtype=np.float32), spacing)
+    inv_length = 1 / np.sqrt(dh_dx * dh_dx + dh_dz * dh_dz + 1)
+    return np.stack((-dh_dx * inv_length, inv_length, -dh_dz * inv_length), axis=-1)
+
+
+def grid_vertex_buffer(xs, zs, heights, normals):
+    """Vertex buffer entrelace 'p3f,n3f' (float32, shape (len(zs) * len(xs), 6)) d'une grille [z, x].
+
+    Positions et normales sont ecrites directement dans le buffer final, sans tableau intermediaire.
+    """
+    rows, cols = len(zs), len(xs)
+    buffer = np.empty((rows, cols, 6), dtype=np.float32)
+    buffer[..., 0] = np.asarray(xs, dtype=np.float32)[None, :]
+    buffer[..., 1] = heights
+    buffer[..., 2] = np.asarray(zs, dtype=np.float32)[:, None]
+    buffer[..., 3:] = np.reshape(normals, (rows, cols, 3))
+    return buffer.reshape(-1, 6)
+
+
+def _perimeter(width):
+    # Indices du bord de la grille, parcourus dans le sens sud -> est -> nord -> ouest
+    edge = np.arange(width - 1)
+    return np.concatenate((
+        edge,                                  # sud   (z = 0, x croissant)
+        edge * width + (width - 1),            # est   (x = max, z croissant)
+        (width - 1) * width + (width - 1 - edge),  # nord (z = max, x decroissant)
+        (width - 1 - edge) * width,            # ouest (x = 0, z decroissant)
+    ))
+
+
+def add_skirt(vertex_buffer, triangles, width, depth):
+    """Ajoute une jupe verticale de `depth` sous le bord d'une grille width x width.
+
+    La jupe masque les fissures entre deux tuiles voisines de resolution differente.
+    Retourne les nouveaux (vertex_buffer, triangles).
+    """
+    border = _perimeter(width)
+    skirt_buffer = vertex_buffer[border]
+    skirt_buffer[:, 1] -= depth
+
+    total = len(vertex_buffer) + len(border)
+    skirt = np.arange(len(vertex_buffer), total)
+    b0, b1 = border, np.roll(border, -1)
+    s0, s1 = skirt, np.roll(skirt, -1)
+    skirt_triangles = np.stack((b0, s0, b1, b1, s0, s1), axis=-1).ravel()
+    dtype = index_dtype(total)
+    return (
+        np.concatenate((vertex_buffer, skirt_buffer)),
+        np.concatenate((triangles.astype(dtype), skirt_triangles.astype(dtype))),
+    )
+
+
+def refresh_vertex_buffer(vertex_buffer, heights, spacing, window):
+    """Met a jour, apres modification des hauteurs du rectangle `window` (j0, j1, i0, i1), les
+    hauteurs et normales d'un vertex buffer de grille (rows, cols, 6).
+
+    Les normales (differences centrees) changent jusqu'a un sommet autour de la zone ; elles sont
+    calculees sur un bloc elargi de deux sommets pour garder les memes voisins qu'une grille
+    complete. Retourne le rectangle dont les sommets ont change.
+    """
+    rows, cols = heights.shape
+    j0, j1, i0, i1 = window
+    nj0, nj1, ni0, ni1 = max(j0 - 1, 0), min(j1 + 1, rows), max(i0 - 1, 0), min(i1 + 1, cols)
+    bj0, bj1, bi0, bi1 = max(nj0 - 1, 0), min(nj1 + 1, rows), max(ni0 - 1, 0), min(ni1 + 1, cols)
+    normals = grid_normals(heights[bj0:bj1, bi0:bi1], spacing)
+    vertex_buffer[j0:j1, i0:i1, 1] = heights[j0:j1, i0:i1]
+    vertex_buffer[nj0:nj1, ni0:ni1, 3:] = normals[nj0 - bj0:nj1 - bj0, ni0 - bi0:ni1 - bi0]
+    return nj0, nj1, ni0, ni1
+
+
+def upload_rows(mesh, vertex_buffer, window):
+    """Copie le rectangle `window` d'un vertex buffer de grille (rows, cols, 6) dans le tableau de
+    sommets du GeomNode `mesh` (cree par geom_node), ligne par ligne (thread principal)."""
+    j0, j1, i0, i1 = window
+    cols = vertex_buffer.shape[1]
+    array = mesh.node().modify_geom(0).modify_vertex_data().modify_array(0)
+    target = memoryview(array).cast('B')
+    source = memoryview(vertex_buffer.reshape(-1)).cast('B')
+    stride = 6 * 4
+    for j in range(j0, j1):
+        start, end = (j * cols + i0) * stride, (j * cols + i1) * stride
+        target[start:end] = source[start:end]
+
+
+def geom_node(vertex_buffer, indices, name='terrain', vertex_format=None):
+    """Cree le GeomNode Panda3D en copiant les buffers numpy tels quels (thread principal).
+
+    Par defaut les sommets sont au format v3n3 (float32 (N, 6)) ; avec `vertex_format`, le
+    buffer (tableau structure) doit deja avoir la disposition en octets de ce format.
+    """
+    if vertex_format is None:
+        vertex_format = GeomVertexFormat.get_v3n3()
+        vertex_buffer = np.asarray(vertex_buffer, dtype=np.float32)
+    vdata = GeomVertexData(name, vertex_format, Geom.UH_static)
+    vdata.unclean_set_num_rows(len(vertex_buffer))
+    memoryview(vdata.modify_array(0)).cast('B')[:] = np.ascontiguousarray(vertex_buffer).view(np.uint8).reshape(-1)
+
+    primitive = GeomTriangles(Geom.UH_static)
+    primitive.set_index_type(Geom.NT_uint16 if indices.dtype == np.uint16 else Geom.NT_uint32)
+    handle = primitive.modify_vertices()
+    handle.unclean_set_num_rows(len(indices))
+    memoryview(handle).cast('B')[:] = memoryview(np.ascontiguousarray(indices)).cast('B')
+
+    geom = Geom(vdata)
+    geom.add_primitive(primitive)
+    node = GeomNode(name)
+    node.add_geom(geom)
+    return NodePath(node)
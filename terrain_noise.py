@@ -0,0 +1,166 @@
+# terrain_noise.py
+# Moteur de bruit de gradient vectorise (NumPy) pour la generation du terrain.
+# Toutes les fonctions travaillent sur des grilles completes : aucune boucle Python par vertex.
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+
+# A incrementer des que le resultat numerique du moteur change (sert de cle de cache).
+NOISE_ENGINE_VERSION = 1
+
+# 8 directions de gradient unitaires (type Perlin 2D)
+_DIAG = np.float32(0.70710678)
+_GRAD_X = np.array([1, -1, 0, 0, _DIAG, -_DIAG, _DIAG, -_DIAG], dtype=np.float32)
+_GRAD_Z = np.array([0, 0, 1, -1, _DIAG, _DIAG, -_DIAG, -_DIAG], dtype=np.float32)
+
+
+def grid_axis(segments, size):
+    """Coordonnees monde des (segments + 1) vertices d'un axe de la grille, centrees sur 0."""
+    return (np.arange(segments + 1, dtype=np.float64) - segments / 2) * (size / segments)
+
+
+def _fade(t):
+    # Courbe de lissage quintique 6t^5 - 15t^4 + 10t^3
+    return t * t * t * (t * (t * 6 - 15) + 10)
+
+
+def _lattice(coords):
+    # Separe des coordonnees 1D en indice de cellule (0..255) et partie fractionnaire float32.
+    cell = np.floor(coords)
+    frac = (coords - cell).astype(np.float32)
+    return cell.astype(np.int64) & 255, frac
+
+
+class GradientNoise:
+    """Bruit de gradient 2D deterministe a partir d'une graine.
+
+    `lattice_scale` reproduit le facteur `octaves` de `perlin_noise.PerlinNoise`,
+    qui multiplie les coordonnees avant evaluation.
+    """
+
+    def __init__(self, seed, lattice_scale=4.0):
+        perm = np.random.default_rng(seed).permutation(256).astype(np.int32)
+        self.perm = np.concatenate((perm, perm))
+        self.seed = seed
+        self.lattice_scale = lattice_scale
+
+    def grid(self, xs, zs):
+        """Evalue le bruit sur la grille produit (zs x xs). Retourne un tableau float32 (len(zs), len(xs))."""
+        xs = np.asarray(xs, dtype=np.float64)
+        zs = np.asarray(zs, dtype=np.float64)
+        return self.sample(xs[None, :], zs[:, None])
+
+    def sample(self, x, z):
+        """Evalue le bruit aux points (x, z), tableaux de formes compatibles (broadcasting).
+
+        Avec x de forme (1, W) et z de forme (H, 1), les calculs par axe ne sont faits
+        qu'une fois par colonne / ligne : c'est le chemin rapide utilise par `grid`.
+        """
+        xi, fx = _lattice(np.asarray(x, dtype=np.float64) * self.lattice_scale)
+        zi, fz = _lattice(np.asarray(z, dtype=np.float64) * self.lattice_scale)
+        u = _fade(fx)
+        v = _fade(fz)
+
+        # Hachage des 4 coins : perm[perm[x] + z], calcule par broadcasting
+        px0 = self.perm[xi]
+        px1 = self.perm[xi + 1]
+        zi1 = zi + 1
+        h00 = self.perm[px0 + zi] & 7
+        h10 = self.perm[px1 + zi] & 7
+        h01 = self.perm[px0 + zi1] & 7
+        h11 = self.perm[px1 + zi1] & 7
+
+        fx1 = fx - 1
+        fz1 = fz - 1
+        n00 = _GRAD_X[h00] * fx + _GRAD_Z[h00] * fz
+        n10 = _GRAD_X[h10] * fx1 + _GRAD_Z[h10] * fz
+        n01 = _GRAD_X[h01] * fx + _GRAD_Z[h01] * fz1
+        n11 = _GRAD_X[h11] * fx1 + _GRAD_Z[h11] * fz1
+
+        nx0 = n00 + u * (n10 - n00)
+        nx1 = n01 + u * (n11 - n01)
+        return nx0 + v * (nx1 - nx0)
+
+
+class FractalNoise:
+    """Somme fBm de plusieurs octaves de `GradientNoise`.
+
+    Le calendrier est celui de l'ancienne boucle de `TerrainGenerator.update` :
+    frequence initiale `base_frequency / size`, puis frequence *= lacunarity et
+    amplitude *= persistence a chaque octave.
+    """
+
+    def __init__(self, seed, size, octaves=4, base_frequency=2.5, amplitude=12.0,
+                 lacunarity=2.5, persistence=0.4):
+        self.noise = GradientNoise(seed)
+        self.seed = seed
+        self.size = size
+        self.octaves = octaves
+        self.base_frequency = base_frequency
+        self.amplitude = amplitude
+        self.lacunarity = lacunarity
+        self.persistence = persistence
+
+    def params(self):
+        """Parametres qui determinent entierement le resultat (utilises comme cle de cache)."""
+        return dict(
+            seed=self.seed, size=self.size, octaves=self.octaves, base_frequency=self.base_frequency,
+            amplitude=self.amplitude, lacunarity=self.lacunarity, persistence=self.persistence,
+            lattice_scale=self.noise.lattice_scale)
+
+    def grid(self, xs, zs):
+        """Hauteurs fBm (float32) sur la grille produit (zs x xs), en coordonnees monde."""
+        xs = np.asarray(xs, dtype=np.float64)
+        zs = np.asarray(zs, dtype=np.float64)
+        heights = np.zeros((len(zs), len(xs)), dtype=np.float32)
+        frequency, amplitude = self.base_frequency / self.size, self.amplitude
+        for _ in range(self.octaves):
+            heights += self.noise.grid(xs * frequency, zs * frequency) * np.float32(amplitude)
+            frequency *= self.lacunarity
+            amplitude *= self.persistence
+        return heights
+
+    def heightmap(self, segments):
+        """Grille complete (segments + 1) x (segments + 1) du terrain, indexee [z, x]."""
+        axis = grid_axis(segments, self.size)
+        return self.grid(axis, axis)
+
+
+def _fill_band(shm_name, shape, noise, xs, zs, z0, z1):
+    # Processus de travail : ecrit les lignes [z0, z1) directement dans la memoire partagee
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+        out[z0:z1] = noise.grid(xs, zs[z0:z1])
+        del out
+    finally:
+        shm.close()
+
+
+def parallel_grid(noise, xs, zs, workers, bands_per_worker=4):
+    """Meme resultat que `noise.grid(xs, zs)`, calcule par bandes de lignes dans un pool de processus.
+
+    Chaque ligne ne depend que de sa coordonnee z : le resultat est identique a l'octet pres
+    quel que soit le nombre de processus ou le decoupage en bandes.
+    """
+    xs = np.asarray(xs, dtype=np.float64)
+    zs = np.asarray(zs, dtype=np.float64)
+    shape = (len(zs), len(xs))
+    if workers <= 1 or len(zs) < 2 or not getattr(noise, 'parallel', True):
+        return noise.grid(xs, zs)
+
+    shm = shared_memory.SharedMemory(create=True, size=int(np.prod(shape)) * 4)
+    try:
+        edges = np.linspace(0, len(zs), min(len(zs), workers * bands_per_worker) + 1).astype(int)
+        # 'spawn' comme sous Windows : l'appelant (thread de generation) tourne dans un processus
+        # deja multi-thread (Panda3D, chargement du rover), qu'un fork pourrait bloquer
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = [pool.submit(_fill_band, shm.name, shape, noise, xs, zs, z0, z1)
+                       for z0, z1 in zip(edges[:-1], edges[1:]) if z1 > z0]
+            for future in futures:
+                future.result()
+        return np.ndarray(shape, dtype=np.float32, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+        shm.unlink()
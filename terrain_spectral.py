@@ -0,0 +1,91 @@
+# terrain_spectral.py
+# Generateur de terrain par synthese spectrale : un bruit blanc filtre dans le domaine
+# frequentiel par un spectre en loi de puissance (surface fractale), en O(N^2 log N).
+# Le resultat est periodique, donc raccordable sans couture (tuiles, terrain infini).
+import numpy as np
+
+# A incrementer des que le resultat numerique du generateur change (sert de cle de cache).
+SPECTRAL_ENGINE_VERSION = 1
+
+
+def spectral_heightmap(seed, resolution, period, hurst=0.8, amplitude=4.0, corner_wavelength=None):
+    """Grille periodique (resolution x resolution, float32) d'une surface fractale.
+
+    `hurst` (0..1) : exposant de Hurst, plus il est faible plus la surface est rugueuse.
+    Le spectre de puissance decroit en f^-(2H + 2) ; il est aplati sous la frequence de
+    coupure 1 / `corner_wavelength` pour eviter les pentes geantes a grande echelle.
+    `amplitude` : ecart-type des hauteurs (rugosite RMS) apres normalisation.
+    """
+    rng = np.random.default_rng(seed)
+    fz = np.fft.fftfreq(resolution, d=period / resolution).astype(np.float32)[:, None]
+    fx = np.fft.rfftfreq(resolution, d=period / resolution).astype(np.float32)[None, :]
+    f = np.sqrt(fx * fx + fz * fz)
+    corner = 1.0 / (corner_wavelength or period)
+    f = np.maximum(f, np.float32(corner))
+    filter_ = f ** np.float32(-(hurst + 1))
+    filter_[0, 0] = 0  # Hauteur moyenne nulle
+
+    shape = filter_.shape
+    spectrum = np.empty(shape, dtype=np.complex64)
+    spectrum.real = rng.standard_normal(shape, dtype=np.float32)
+    spectrum.imag = rng.standard_normal(shape, dtype=np.float32)
+    spectrum *= filter_
+    del filter_, f
+
+    heights = np.fft.irfft2(spectrum, s=(resolution, resolution)).astype(np.float32, copy=False)
+    std = heights.std()
+    if std > 0: heights *= np.float32(amplitude / std)
+    return heights
+
+
+class SpectralNoise:
+    """Source de hauteurs spectrale, meme interface que terrain_noise.FractalNoise.
+
+    La tuile periodique est calculee une fois (a la premiere requete), puis echantillonnee
+    par interpolation bilineaire avec repetition. Quand la grille demandee coincide avec
+    celle de la tuile (resolution = TERRAIN_SEGMENTS, periode = TERRAIN_SIZE), les valeurs
+    sont exactement celles de la tuile.
+    """
+
+    parallel = False  # La FFT est calculee une fois pour toute la grille : pas de decoupage en bandes
+
+    def __init__(self, seed, size, resolution, hurst=0.8, amplitude=4.0, corner_wavelength=None):
+        self.seed = seed
+        self.size = size
+        self.resolution = resolution
+        self.hurst = hurst
+        self.amplitude = amplitude
+        self.corner_wavelength = corner_wavelength
+        self._tile = None
+
+    def params(self):
+        return dict(backend='spectral', seed=self.seed, size=self.size, resolution=self.resolution,
+                    hurst=self.hurst, amplitude=self.amplitude, corner_wavelength=self.corner_wavelength,
+                    spectral_version=SPECTRAL_ENGINE_VERSION)
+
+    @property
+    def tile(self):
+        if self._tile is None:
+            self._tile = spectral_heightmap(self.seed, self.resolution, self.size, self.hurst,
+                                            self.amplitude, self.corner_wavelength)
+        return self._tile
+
+    def _axis(self, coords):
+        # Coordonnees monde -> indices de la tuile ; l'origine de la tuile est en -size / 2
+        u = (np.asarray(coords, dtype=np.float64) + self.size / 2) * (self.resolution / self.size)
+        nearest = np.round(u)
+        u = np.where(np.abs(u - nearest) < 1e-6, nearest, u)
+        i0 = np.floor(u)
+        weight = (u - i0).astype(np.float32)
+        i0 = i0.astype(np.int64) % self.resolution
+        return i0, (i0 + 1) % self.resolution, weight
+
+    def grid(self, xs, zs):
+        """Hauteurs (float32) sur la grille produit (zs x xs), en coordonnees monde."""
+        tile = self.tile
+        x0, x1, wx = self._axis(xs)
+        z0, z1, wz = self._axis(zs)
+        wx, wz = wx[None, :], wz[:, None]
+        top = tile[z0[:, None], x0[None, :]] * (1 - wx) + tile[z0[:, None], x1[None, :]] * wx
+        bottom = tile[z1[:, None], x0[None, :]] * (1 - wx) + tile[z1[:, None], x1[None, :]] * wx
+        return top * (1 - wz) + bottom * wz
@@ -0,0 +1,8 @@
+# Application Ursina sans fenetre, partagee par les tests des entites (une seule instance par processus)
+import pytest
+
+
+@pytest.fixture(scope="session")
+def ursina_app():
+    ursina = pytest.importorskip("ursina")
+    return ursina.Ursina(window_type='none')
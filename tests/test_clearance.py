@@ -0,0 +1,61 @@
+# Champ de distance aux obstacles : les mises a jour locales donnent exactement la reconstruction complete
+import numpy as np
+from clearance import ClearanceField
+from spatial_index import SpatialHash
+
+
+class Rocks:
+    """Etat en tableaux d'un obstacles.ObstacleField (sans le rendu Ursina), pour ClearanceField."""
+
+    def __init__(self, positions, radii):
+        self.centers = np.zeros((0, 3), dtype=np.float32)
+        self.radii = np.zeros(0, dtype=np.float32)
+        self.alive = np.zeros(0, dtype=bool)
+        self.index = SpatialHash(4.0)
+        self.listeners = []
+        self.add(positions, radii)
+
+    def add(self, positions, radii):
+        start = len(self.centers)
+        self.centers = np.concatenate((self.centers, np.asarray(positions, dtype=np.float32)))
+        self.radii = np.concatenate((self.radii, np.asarray(radii, dtype=np.float32)))
+        self.alive = np.concatenate((self.alive, np.ones(len(positions), dtype=bool)))
+        added = np.arange(start, len(self.centers))
+        reach = self.radii[added, None]
+        self.index.insert_many(added.tolist(), self.centers[added] - reach, self.centers[added] + reach)
+        for listener in self.listeners: listener(added, added[:0])
+
+    def remove(self, indices):
+        indices = np.asarray(indices, dtype=np.int64)
+        self.alive[indices] = False
+        for i in indices.tolist(): self.index.remove(i)
+        for listener in self.listeners: listener(indices[:0], indices)
+
+    def nearby(self, lo, hi):
+        return np.array(self.index.query(lo, hi), dtype=np.int64)
+
+
+def random_rocks(rng, count, size=60):
+    positions = np.zeros((count, 3))
+    positions[:, [0, 2]] = rng.uniform(-size / 2, size / 2, (count, 2))
+    return positions, rng.uniform(0.2, 1.5, count)
+
+
+def test_incremental_updates_equal_full_rebuild():
+    rng = np.random.default_rng(4)
+    rocks = Rocks(*random_rocks(rng, 300))
+    field = ClearanceField(rocks, size=60, cell_size=0.5, max_distance=3.0)
+    rocks.remove(rng.choice(300, 40, replace=False))
+    rocks.add(*random_rocks(rng, 25))
+    rocks.remove([300, 301, 5])
+
+    rebuilt = ClearanceField(rocks, size=60, cell_size=0.5, max_distance=3.0)
+    assert np.array_equal(field.distances, rebuilt.distances)
+
+
+def test_sample_signs_and_outside():
+    rocks = Rocks([(0, 0, 0)], [1.0])
+    field = ClearanceField(rocks, size=20, cell_size=0.25, max_distance=5.0)
+    assert field.clearance_at(0, 0) < 0
+    assert abs(field.clearance_at(3, 0) - 2.0) < 0.05
+    assert field.clearance_at(50, 0) is None
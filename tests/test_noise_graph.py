@@ -0,0 +1,31 @@
+# Graphe de bruit : un noeud spectral donne les memes hauteurs quelle que soit la grille evaluee
+import pytest
+from noise_graph import NoiseGraph
+from terrain_noise import grid_axis, parallel_grid
+
+GRAPH = {
+    'base': {'op': 'fbm', 'octaves': 3, 'frequency': 2.0, 'amplitude': 6},
+    'rough': {'op': 'spectral', 'seed': 2, 'resolution': 64, 'amplitude': 1.5},
+    'output': {'op': 'add', 'inputs': ['base', 'rough']},
+}
+
+
+def test_spectral_independent_of_grid():
+    graph = NoiseGraph(GRAPH, seed=11, size=50)
+    axis = grid_axis(96, 50)
+    full = graph.grid(axis, axis)
+    # Sous-grille (une tuile, une bande) et grille plus grossiere (un LOD) : memes valeurs aux memes points
+    assert graph.grid(axis[20:41], axis[5:30]).tobytes() == full[5:30, 20:41].tobytes()
+    assert graph.grid(axis[::4], axis[::4]).tobytes() == full[::4, ::4].tobytes()
+    assert parallel_grid(graph, axis, axis, 2).tobytes() == full.tobytes()
+
+
+def test_spectral_requires_resolution():
+    nodes = dict(GRAPH, rough={'op': 'spectral', 'amplitude': 1.5})
+    with pytest.raises(ValueError):
+        NoiseGraph(nodes, seed=11, size=50)
+    graph = NoiseGraph(GRAPH, seed=11, size=50)
+    with pytest.raises(ValueError):
+        graph.set_node('rough', {'op': 'spectral'})
+    graph.update_node('rough', resolution=32)
+    assert graph.params()['graph']['rough']['resolution'] == 32
@@ -0,0 +1,68 @@
+# Lecture des STL binaires et soudure des sommets (sans Ursina)
+import os
+import numpy as np
+import pytest
+from rover_assets import read_stl, weld_mesh
+
+ASSETS = os.path.join(os.path.dirname(__file__), os.pardir, 'my-robot', 'assets')
+STL_TRIANGLE = np.dtype([('normal', '<f4', (3,)), ('vertices', '<f4', (3, 3)), ('attribute', '<u2')])
+
+# Cube unite, 2 triangles par face, sens direct vu de l'exterieur
+CUBE_CORNERS = np.array([[x, y, z] for x in (0, 1) for y in (0, 1) for z in (0, 1)], dtype=np.float32)
+CUBE_FACES = [(0, 1, 3, 2), (4, 6, 7, 5), (0, 4, 5, 1), (2, 3, 7, 6), (0, 2, 6, 4), (1, 5, 7, 3)]
+
+
+def cube_triangles():
+    quads = np.array(CUBE_FACES)
+    indices = np.concatenate((quads[:, [0, 1, 2]], quads[:, [0, 2, 3]]))
+    return CUBE_CORNERS[indices]
+
+
+def write_stl(path, triangles):
+    records = np.zeros(len(triangles), dtype=STL_TRIANGLE)
+    records['vertices'] = triangles
+    with open(path, 'wb') as f:
+        f.write(bytes(80))
+        f.write(np.uint32(len(triangles)).astype('<u4').tobytes())
+        f.write(records.tobytes())
+
+
+def unwelded(vertex_buffer, indices):
+    return vertex_buffer[indices.astype(np.int64), :3].reshape(-1, 3, 3)
+
+
+def test_read_binary_and_ascii(tmp_path):
+    path = str(tmp_path / 'cube.stl')
+    write_stl(path, cube_triangles())
+    assert np.array_equal(read_stl(path), cube_triangles())
+
+    ascii_path = tmp_path / 'cube_ascii.stl'
+    ascii_path.write_text("solid cube\nendsolid cube\n")
+    assert read_stl(str(ascii_path)) is None
+
+
+def test_cube_smooth_and_sharp():
+    triangles = cube_triangles()
+    # Les 3 faces d'un coin sont a moins de 90 degres de sa normale moyenne et a plus de 45
+    vertex_buffer, indices = weld_mesh(triangles, crease_angle=90)
+    assert len(vertex_buffer) == 8
+    assert np.array_equal(unwelded(vertex_buffer, indices), triangles)
+
+    vertex_buffer, indices = weld_mesh(triangles, crease_angle=20)
+    assert len(vertex_buffer) == 24
+    assert np.array_equal(unwelded(vertex_buffer, indices), triangles)
+    # Chaque coin porte exactement la normale de sa face
+    cross = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+    faces = np.repeat(cross / np.linalg.norm(cross, axis=1, keepdims=True), 3, axis=0)
+    assert np.allclose(vertex_buffer[indices.astype(np.int64), 3:], faces, atol=1e-6)
+
+
+@pytest.mark.skipif(not os.path.exists(os.path.join(ASSETS, 'wheel_lf.stl')), reason="assets du rover absents")
+def test_weld_robot_part():
+    triangles = read_stl(os.path.join(ASSETS, 'wheel_lf.stl'))
+    vertex_buffer, indices = weld_mesh(triangles)
+    assert vertex_buffer.dtype == np.float32 and vertex_buffer.shape[1] == 6
+    assert indices.dtype == np.uint16
+    assert np.array_equal(unwelded(vertex_buffer, indices), triangles + np.float32(0))
+    assert len(vertex_buffer) < len(triangles) * 3
+    assert np.allclose(np.linalg.norm(vertex_buffer[:, 3:], axis=1), 1, atol=1e-5)
@@ -0,0 +1,51 @@
+# Fichier .rxtb : un terrain relu est identique au terrain ecrit
+import os
+import numpy as np
+import pytest
+from terrain_bake import save_bake, load_bake
+from terrain_field import TerrainField
+from terrain_mesh import grid_normals, grid_triangles, grid_vertex_buffer
+
+
+def baked_terrain(segments, size=40.0):
+    heights = np.random.default_rng(segments).normal(size=(segments + 1, segments + 1)).astype(np.float32)
+    field = TerrainField.centered(heights, size)
+    xs = field.origin_x + np.arange(field.cols) * field.spacing
+    zs = field.origin_z + np.arange(field.rows) * field.spacing
+    vertex_buffer = grid_vertex_buffer(xs, zs, heights, grid_normals(heights, field.spacing))
+    return field, vertex_buffer, grid_triangles(segments)
+
+
+# 33 x 33 sommets : indices uint16 ; 301 x 301 (> 65535 sommets) : uint32
+@pytest.mark.parametrize("segments, dtype", [(32, np.uint16), (300, np.uint32)])
+def test_round_trip(tmp_path, segments, dtype):
+    field, vertex_buffer, triangles = baked_terrain(segments)
+    assert triangles.dtype == dtype
+    path = str(tmp_path / "bake" / "terrain.rxtb")
+    save_bake(path, field, vertex_buffer, triangles, seed=-123456789012)
+    assert not os.path.exists(path + ".tmp")
+
+    loaded, positions, normals, indices, seed = load_bake(path)
+    assert seed == -123456789012
+    assert (loaded.rows, loaded.cols) == (field.rows, field.cols)
+    assert (loaded.origin_x, loaded.origin_z, loaded.spacing) == (field.origin_x, field.origin_z, field.spacing)
+    assert np.array_equal(loaded.heights, field.heights)
+    assert np.array_equal(positions, vertex_buffer[:, :3])
+    assert np.array_equal(normals, vertex_buffer[:, 3:])
+    assert indices.dtype == dtype
+    assert np.array_equal(indices, triangles)
+    # Memory-map en lecture seule : TerrainEditor copie les hauteurs avant de les modifier
+    assert not loaded.heights.flags.writeable
+
+
+# Magic inconnu ; version 1 (sans graine dans l'en-tete)
+@pytest.mark.parametrize("offset, patch", [(0, b"XXXX"), (4, b"\x01\x00\x00\x00")])
+def test_incompatible_file(tmp_path, offset, patch):
+    field, vertex_buffer, triangles = baked_terrain(8)
+    path = str(tmp_path / "terrain.rxtb")
+    save_bake(path, field, vertex_buffer, triangles, seed=7)
+    with open(path, "r+b") as f:
+        f.seek(offset)
+        f.write(patch)
+    with pytest.raises(ValueError):
+        load_bake(path)
@@ -0,0 +1,44 @@
+# Collider du terrain par tuiles : construction a la demande, raycast, invalidation et liberation
+import numpy as np
+import pytest
+from terrain_field import TerrainField
+
+pytest.importorskip("ursina")
+from ursina import Entity, Vec3  # noqa: E402
+from terrain_collision import TiledTerrainCollider  # noqa: E402
+
+
+@pytest.fixture
+def collider(ursina_app):
+    # Plan incline de 17 x 17 sommets sur 16 m : 2 x 2 tuiles de 8 cellules
+    heights = np.fromfunction(lambda j, i: 0.1 * i + 0.05 * j, (17, 17)).astype(np.float32)
+    collider = TiledTerrainCollider(TerrainField.centered(heights, 16), tile_cells=8, keep_radius=4)
+    yield collider
+    collider.invalidate(-8, -8, 8, 8)
+
+
+def test_raycast_builds_one_tile(collider):
+    hit = collider.raycast(Vec3(1, 5, 1), Vec3(0, -1, 0))
+    assert hit.hit
+    assert hit.world_point.y == pytest.approx(collider.field.height_at(1, 1), abs=1e-4)
+    assert list(collider.tiles) == [(1, 1)]
+    assert collider.tile_extents[(1, 1)][:4] == (0, 0, 8, 8)
+
+
+def test_ray_above_terrain_builds_nothing(collider):
+    assert not collider.raycast(Vec3(-6, 10, -6), Vec3(1, 0, 0), distance=4).hit
+    assert not collider.tiles
+
+
+def test_invalidate_and_release(collider):
+    collider.raycast(Vec3(-4, 5, -4), Vec3(0, -1, 0))
+    collider.raycast(Vec3(4, 5, 4), Vec3(0, -1, 0))
+    assert set(collider.tiles) == {(0, 0), (1, 1)}
+
+    collider.invalidate(-5, -5, -3, -3)
+    assert set(collider.tiles) == set(collider.tile_extents) == {(1, 1)}
+
+    rover = Entity(position=(-20, 0, -20))
+    collider.track(rover)
+    collider.update()
+    assert not collider.tiles and not collider.tile_extents
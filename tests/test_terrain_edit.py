@@ -0,0 +1,82 @@
+# Editions locales du terrain : le vertex buffer et le tableau GPU mis a jour par zones
+# sont identiques a ceux d'une reconstruction complete
+import numpy as np
+import pytest
+from terrain_field import TerrainField
+from terrain_mesh import grid_normals, grid_triangles, grid_vertex_buffer, geom_node, refresh_vertex_buffer, upload_rows
+
+SEGMENTS = 48
+SIZE = 24.0
+
+
+def full_buffer(field):
+    xs = field.origin_x + np.arange(field.cols) * field.spacing
+    zs = field.origin_z + np.arange(field.rows) * field.spacing
+    return grid_vertex_buffer(xs, zs, field.heights, grid_normals(field.heights, field.spacing))
+
+
+def gpu_bytes(mesh):
+    return bytes(memoryview(mesh.node().get_geom(0).get_vertex_data().get_array(0)).cast('B'))
+
+
+# Rectangles (j0, j1, i0, i1) : interieur, coins, bords, grille entiere, chevauchements
+EDITS = [
+    [(10, 20, 12, 18)],
+    [(0, 3, 0, 4), (SEGMENTS - 2, SEGMENTS + 1, SEGMENTS - 5, SEGMENTS + 1)],
+    [(0, SEGMENTS + 1, 7, 8), (30, 31, 0, SEGMENTS + 1)],
+    [(0, SEGMENTS + 1, 0, SEGMENTS + 1)],
+    [(5, 15, 5, 15), (10, 25, 10, 25), (1, 2, 40, 41)],
+]
+
+
+@pytest.mark.parametrize("windows", EDITS)
+def test_partial_edits_equal_full_rebuild(windows):
+    rng = np.random.default_rng(3)
+    field = TerrainField.centered(rng.normal(size=(SEGMENTS + 1, SEGMENTS + 1)).astype(np.float32), SIZE)
+    vertex_buffer = full_buffer(field)
+    mesh = geom_node(vertex_buffer, grid_triangles(SEGMENTS))
+    grid = vertex_buffer.reshape(field.rows, field.cols, 6)
+
+    for j0, j1, i0, i1 in windows:
+        field.heights[j0:j1, i0:i1] += rng.normal(size=(j1 - j0, i1 - i0)).astype(np.float32)
+        changed = refresh_vertex_buffer(grid, field.heights, field.spacing, (j0, j1, i0, i1))
+        upload_rows(mesh, grid, changed)
+
+    expected = full_buffer(field)
+    assert np.array_equal(vertex_buffer, expected)
+    assert gpu_bytes(mesh) == expected.tobytes()
+
+
+def test_changed_window_covers_normals():
+    field = TerrainField.centered(np.zeros((SEGMENTS + 1, SEGMENTS + 1), dtype=np.float32), SIZE)
+    grid = full_buffer(field).reshape(field.rows, field.cols, 6)
+    field.heights[20:22, 0:3] = 1
+    # Une ligne/colonne de plus autour de l'edition, tronquee au bord de la grille
+    assert refresh_vertex_buffer(grid, field.heights, field.spacing, (20, 22, 0, 3)) == (19, 23, 0, 4)
+
+
+def test_editor_invalidates_collider_tiles(ursina_app):
+    from ursina import Vec3
+    from terrain_collision import TiledTerrainCollider
+    from terrain_edit import TerrainEditor
+
+    field = TerrainField.centered(np.zeros((SEGMENTS + 1, SEGMENTS + 1), dtype=np.float32), SIZE)
+    vertex_buffer = full_buffer(field)
+    collider = TiledTerrainCollider(field, tile_cells=8)
+    editor = TerrainEditor(field, vertex_buffer, geom_node(vertex_buffer, grid_triangles(SEGMENTS)), collider)
+    assert editor.terrain_collider is collider
+    invalidated = []
+    real_invalidate = collider.invalidate
+    collider.invalidate = lambda *rect: (invalidated.append(rect), real_invalidate(*rect))
+
+    assert collider.raycast(Vec3(2, 5, 2), Vec3(0, -1, 0)).world_point.y == pytest.approx(0, abs=1e-4)
+    j0, j1, i0, i1 = editor.add(1, 1, 3, 3, 2.0)
+    editor.flush()
+
+    # Rectangle monde des sommets modifies, elargi d'un sommet (normales)
+    s = field.spacing
+    assert invalidated == [(field.origin_x + (i0 - 1) * s, field.origin_z + (j0 - 1) * s,
+                            field.origin_x + i1 * s, field.origin_z + j1 * s)]
+    assert not collider.tiles
+    assert collider.raycast(Vec3(2, 5, 2), Vec3(0, -1, 0)).world_point.y == pytest.approx(2, abs=1e-4)
+    collider.invalidate(-SIZE, -SIZE, SIZE, SIZE)
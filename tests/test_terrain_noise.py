@@ -0,0 +1,19 @@
+# Calcul parallele du bruit : resultat identique a l'octet pres a noise.grid
+import pytest
+from terrain_noise import FractalNoise, grid_axis, parallel_grid
+
+
+@pytest.mark.parametrize('workers, bands_per_worker', [(1, 4), (2, 1), (2, 4), (3, 3)])
+def test_parallel_grid_matches_serial(workers, bands_per_worker):
+    noise = FractalNoise(seed=7, size=50)
+    axis = grid_axis(96, 50)
+    expected = noise.grid(axis, axis)
+    result = parallel_grid(noise, axis, axis, workers, bands_per_worker)
+    assert result.dtype == expected.dtype
+    assert result.tobytes() == expected.tobytes()
+
+
+def test_parallel_grid_non_square():
+    noise = FractalNoise(seed=3, size=80)
+    xs, zs = grid_axis(40, 80), grid_axis(17, 80)[:-3]
+    assert parallel_grid(noise, xs, zs, 2).tobytes() == noise.grid(xs, zs).tobytes()